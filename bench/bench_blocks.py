@@ -0,0 +1,71 @@
+import os
+import random
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from block_markdown import BlockType, block_to_block_type, block_to_html_node
+
+
+# The classifier as it was before classify_block, for comparison.
+def regex_block_to_block_type(block: str) -> BlockType:
+    if re.findall(r"^(#{1,6}) ", block):
+        return BlockType.HEADING
+    if re.findall(r"^```(?:\n[\s\S]*?)?\n```$", block):
+        return BlockType.CODE
+    lines = block.split("\n")
+    if block.startswith(">"):
+        for line in lines:
+            if not line.startswith(">"):
+                return BlockType.PARAGRAPH
+        return BlockType.QUOTE
+    if block.startswith("- "):
+        for line in lines:
+            if not line.startswith("- "):
+                return BlockType.PARAGRAPH
+        return BlockType.UNORDERED_LIST
+    if block.startswith("1. "):
+        i = 1
+        for line in lines:
+            if not line.startswith(f"{i}. "):
+                return BlockType.PARAGRAPH
+            i += 1
+        return BlockType.ORDERED_LIST
+    return BlockType.PARAGRAPH
+
+
+def block_corpus(count=20_000, seed=0):
+    rng = random.Random(seed)
+    makers = [
+        lambda: "#" * rng.randint(1, 6) + " A heading with **bold**",
+        lambda: "A paragraph line with _italic_ text\nand a second line",
+        lambda: "```\n" + "code line\n" * rng.randint(1, 40) + "```",
+        lambda: "\n".join("> quoted line" for _ in range(rng.randint(1, 5))),
+        lambda: "\n".join("- list item" for _ in range(rng.randint(1, 20))),
+        lambda: "\n".join(f"{i}. item" for i in range(1, rng.randint(2, 20))),
+        lambda: "- looks like a list\nbut is a paragraph",
+    ]
+    return [rng.choice(makers)() for _ in range(count)]
+
+
+def run(name, func, corpus, number=5):
+    timings = timeit.repeat(lambda: [func(b) for b in corpus], number=1, repeat=number)
+    seconds = min(timings)
+    per_block = seconds / len(corpus) * 1e9
+    print(f"{name:<28}{seconds * 1000:>8.1f}ms{per_block:>10.0f}ns/block")
+    return seconds
+
+
+def main():
+    corpus = block_corpus()
+    print(f"{len(corpus)} blocks")
+    old = run("regex classifier", regex_block_to_block_type, corpus)
+    new = run("classify_block", block_to_block_type, corpus)
+    print(f"speedup: {old / new:.2f}x")
+    run("block_to_html_node", block_to_html_node, corpus, number=3)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from block_markdown import markdown_to_blocks, markdown_to_html_node
+from copystatic import init_public
+from corpus import CorpusGenerator, worst_cases
+from gencontent import generate_pages_recursive
+from inline_markdown import text_to_textnodes
+
+RESULTS_PATH = os.path.join(os.path.dirname(__file__), "..", ".cache", "bench.jsonl")
+
+
+def best_of(func, repeat: int) -> float:
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def read_pages(content: str) -> list[str]:
+    pages = []
+    for dirpath, _, filenames in os.walk(content):
+        for filename in filenames:
+            with open(os.path.join(dirpath, filename)) as f:
+                pages.append(f.read())
+    return pages
+
+
+def run(args) -> dict:
+    timings = {}
+    with tempfile.TemporaryDirectory() as root:
+        generator = CorpusGenerator(
+            args.pages,
+            args.blocks,
+            args.link_density,
+            args.code_lines,
+            seed=args.seed,
+        )
+        content, static, template = generator.write(root, args.static_files)
+        pages = read_pages(content)
+        paragraphs = [
+            block
+            for page in pages
+            for block in markdown_to_blocks(page)
+            if block[0] not in "#`>-0123456789"
+        ]
+        nodes = [markdown_to_html_node(page) for page in pages]
+
+        timings["markdown_to_html_node"] = best_of(
+            lambda: [markdown_to_html_node(page) for page in pages], args.repeat
+        )
+        timings["text_to_textnodes"] = best_of(
+            lambda: [text_to_textnodes(block) for block in paragraphs], args.repeat
+        )
+        timings["to_html"] = best_of(
+            lambda: [node.to_html() for node in nodes], args.repeat
+        )
+        public = os.path.join(root, "public")
+        timings["init_public"] = best_of(
+            lambda: init_public(static, public), args.repeat
+        )
+
+        def build():
+            init_public(static, public)
+            generate_pages_recursive(content, template, public, "/")
+
+        timings["generate_pages_recursive"] = best_of(build, args.repeat)
+
+    for name, markdown in worst_cases(args.worst_case_size).items():
+        timings[f"worst: {name}"] = best_of(
+            lambda: markdown_to_html_node(markdown).to_html(), args.repeat
+        )
+    return timings
+
+
+def git_revision() -> str | None:
+    try:
+        revision = subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return revision or None
+
+
+def load_results(path: str) -> list[dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the build on a synthetic site.")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--blocks", type=int, default=30, help="blocks per page")
+    parser.add_argument("--link-density", type=float, default=0.1)
+    parser.add_argument("--code-lines", type=int, default=20)
+    parser.add_argument("--static-files", type=int, default=50)
+    parser.add_argument("--worst-case-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs")
+    parser.add_argument("--results", default=RESULTS_PATH, help="JSON lines log")
+    parser.add_argument("--no-save", action="store_true", help="don't log this run")
+    args = parser.parse_args()
+
+    config = {
+        "pages": args.pages,
+        "blocks": args.blocks,
+        "link_density": args.link_density,
+        "code_lines": args.code_lines,
+        "static_files": args.static_files,
+        "worst_case_size": args.worst_case_size,
+        "seed": args.seed,
+    }
+    # Only runs over the same corpus are comparable.
+    previous = [r for r in load_results(args.results) if r["config"] == config]
+    baseline = previous[-1] if previous else None
+
+    timings = run(args)
+    revision = git_revision()
+    header = f"{'benchmark':<36}{'time':>10}"
+    if baseline is not None:
+        header += f"{baseline['revision'] or 'previous':>14}{'change':>9}"
+    print(header)
+    for name, seconds in timings.items():
+        line = f"{name:<36}{seconds * 1000:>8.1f}ms"
+        old = baseline["timings"].get(name) if baseline is not None else None
+        if old:
+            line += f"{old * 1000:>12.1f}ms{seconds / old - 1:>+9.0%}"
+        print(line)
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(args.results), exist_ok=True)
+        record = {
+            "revision": revision,
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "config": config,
+            "timings": timings,
+        }
+        with open(args.results, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+if __name__ == "__main__":
+    main()
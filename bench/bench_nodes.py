@@ -0,0 +1,102 @@
+import os
+import resource
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from block_markdown import markdown_to_html_node
+from htmlnode import LeafNode, ParentNode
+from inline_markdown import text_to_textnodes
+from textnode import TextNode, TextType
+
+
+# Dict-backed copies of the node classes as they were before __slots__,
+# kept here so the comparison can be re-run at any time.
+class DictTextNode:
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+class DictLeafNode:
+    def __init__(self, tag, value, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
+
+
+class DictParentNode:
+    def __init__(self, tag, children, props=None):
+        self.tag = tag
+        self.value = None
+        self.children = children
+        self.props = props
+
+
+def bytes_per_node(factory, count=100_000):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    nodes = [factory(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del nodes
+    # The list holding the nodes costs 8 bytes a slot; leave it out.
+    return (after - before) / count - 8
+
+
+TEXT = "shared text"
+CASES = [
+    (
+        "TextNode",
+        lambda i: DictTextNode(TEXT, TextType.TEXT),
+        lambda i: TextNode(TEXT, TextType.TEXT),
+    ),
+    (
+        "LeafNode",
+        lambda i: DictLeafNode("b", TEXT),
+        lambda i: LeafNode("b", TEXT),
+    ),
+    (
+        "LeafNode (empty props)",
+        lambda i: DictLeafNode(None, TEXT, {}),
+        lambda i: LeafNode(None, TEXT, {}),
+    ),
+    (
+        "ParentNode",
+        lambda i: DictParentNode("li", []),
+        lambda i: ParentNode("li", []),
+    ),
+]
+
+
+def synthetic_page(paragraphs=2000):
+    paragraph = (
+        "Some **bold** and _italic_ text with `code`, a [link](/blog/post) "
+        "and ![an image](/images/a.png) in a sentence that goes on."
+    )
+    return "# Title\n\n" + "\n\n".join(paragraph for _ in range(paragraphs))
+
+
+def main():
+    print(f"{'node':<24}{'dict':>10}{'slots':>10}{'saved':>10}")
+    for name, before, after in CASES:
+        old, new = bytes_per_node(before), bytes_per_node(after)
+        print(f"{name:<24}{old:>9.0f}B{new:>9.0f}B{1 - new / old:>10.0%}")
+
+    markdown = synthetic_page()
+    tracemalloc.start()
+    node = markdown_to_html_node(markdown)
+    text_nodes = text_to_textnodes(markdown.split("\n\n")[1]) * 2000
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del node, text_nodes
+    print(f"synthetic page tree peak: {peak / 1024:.0f} KiB")
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"process peak RSS: {maxrss / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import argparse
+import os
+import random
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog elves rivendell ring shire hobbit "
+    "mountain river forest road tower wizard song night star morning fire"
+).split()
+
+TEMPLATE = """<!doctype html>
+<html>
+  <head>
+    <meta charset="utf-8" />
+    <title>{{ Title }}</title>
+    <link href="/index.css" rel="stylesheet" />
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+
+# Relative weights of each block kind in a generated page.
+DEFAULT_MIX = {
+    "paragraph": 6,
+    "heading": 2,
+    "code": 1,
+    "quote": 1,
+    "unordered_list": 1,
+    "ordered_list": 1,
+}
+
+
+class CorpusGenerator:
+    def __init__(
+        self,
+        pages: int = 200,
+        blocks_per_page: int = 30,
+        link_density: float = 0.1,
+        code_lines: int = 20,
+        mix: dict | None = None,
+        seed: int = 0,
+    ):
+        self.pages = pages
+        self.blocks_per_page = blocks_per_page
+        self.link_density = link_density
+        self.code_lines = code_lines
+        self.mix = mix or DEFAULT_MIX
+        self.rng = random.Random(seed)
+        self.urls = [self.page_url(i) for i in range(pages)]
+
+    def page_path(self, i: int) -> str:
+        if i == 0:
+            return "index.md"
+        return os.path.join("section", f"{i % 10}", f"page{i}", "index.md")
+
+    def page_url(self, i: int) -> str:
+        return "/" + os.path.dirname(self.page_path(i)).replace(os.sep, "/")
+
+    def words(self, count: int) -> list[str]:
+        return [self.rng.choice(WORDS) for _ in range(count)]
+
+    def inline(self, count: int) -> str:
+        words = self.words(count)
+        for i, word in enumerate(words):
+            roll = self.rng.random()
+            if roll < self.link_density:
+                words[i] = f"[{word}]({self.rng.choice(self.urls)})"
+            elif roll < self.link_density + 0.03:
+                words[i] = f"![{word}](/images/{word}.png)"
+            elif roll < self.link_density + 0.08:
+                words[i] = f"**{word}**"
+            elif roll < self.link_density + 0.12:
+                words[i] = f"_{word}_"
+            elif roll < self.link_density + 0.15:
+                words[i] = f"`{word}`"
+        return " ".join(words)
+
+    def block(self, kind: str) -> str:
+        rng = self.rng
+        if kind == "heading":
+            return "#" * rng.randint(2, 6) + " " + self.inline(rng.randint(2, 6))
+        if kind == "code":
+            lines = [
+                " ".join(self.words(rng.randint(1, 8))) for _ in range(self.code_lines)
+            ]
+            return "```\n" + "\n".join(lines) + "\n```"
+        if kind == "quote":
+            return "\n".join(
+                "> " + self.inline(rng.randint(5, 15)) for _ in range(rng.randint(1, 4))
+            )
+        if kind == "unordered_list":
+            return "\n".join(
+                "- " + self.inline(rng.randint(3, 10)) for _ in range(rng.randint(2, 8))
+            )
+        if kind == "ordered_list":
+            return "\n".join(
+                f"{n}. " + self.inline(rng.randint(3, 10))
+                for n in range(1, rng.randint(3, 9))
+            )
+        return "\n".join(
+            self.inline(rng.randint(8, 20)) for _ in range(rng.randint(1, 5))
+        )
+
+    def page(self) -> str:
+        kinds = list(self.mix)
+        weights = [self.mix[kind] for kind in kinds]
+        blocks = [f"# {' '.join(self.words(3)).title()}"]
+        for kind in self.rng.choices(kinds, weights, k=self.blocks_per_page):
+            blocks.append(self.block(kind))
+        return "\n\n".join(blocks) + "\n"
+
+    def write(self, root: str, static_files: int = 50):
+        content = os.path.join(root, "content")
+        for i in range(self.pages):
+            write_file(os.path.join(content, self.page_path(i)), self.page())
+        static = os.path.join(root, "static")
+        write_file(os.path.join(static, "index.css"), "body { margin: 0; }\n")
+        for i in range(static_files):
+            path = os.path.join(static, "images", f"{i % 5}", f"image{i}.png")
+            write_file(path, self.rng.randbytes(4096), binary=True)
+        write_file(os.path.join(root, "template.html"), TEMPLATE)
+        return content, static, os.path.join(root, "template.html")
+
+
+def write_file(path: str, data, binary: bool = False):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb" if binary else "w") as f:
+        f.write(data)
+
+
+# Pathological inputs, each a complete page.
+def worst_cases(size: int = 5000) -> dict[str, str]:
+    return {
+        "links in one paragraph": "# Links\n\n"
+        + " ".join(f"[link {i}](/page/{i})" for i in range(size)),
+        "images in one paragraph": "# Images\n\n"
+        + " ".join(f"![image {i}](/images/{i}.png)" for i in range(size)),
+        "delimiters in one paragraph": "# Delimiters\n\n"
+        + " ".join(f"**b{i}** _i{i}_ `c{i}`" for i in range(size)),
+        "one long code block": "# Code\n\n```\n"
+        + "\n".join(f"line {i} of code" for i in range(size * 10))
+        + "\n```",
+        "one long list": "# List\n\n"
+        + "\n".join(f"- item {i} with [a link](/{i})" for i in range(size)),
+        "many short blocks": "# Blocks\n\n"
+        + "\n\n".join(f"Paragraph {i}." for i in range(size * 2)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic site.")
+    parser.add_argument("root", help="directory to write the site into")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--blocks", type=int, default=30, help="blocks per page")
+    parser.add_argument("--link-density", type=float, default=0.1)
+    parser.add_argument("--code-lines", type=int, default=20)
+    parser.add_argument("--static-files", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generator = CorpusGenerator(
+        args.pages, args.blocks, args.link_density, args.code_lines, seed=args.seed
+    )
+    generator.write(args.root, args.static_files)
+    print(f"Wrote {args.pages} pages to {args.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,19 @@
 import re
+from collections import deque
 from enum import Enum
-from htmlnode import HTMLNode, ParentNode
-from inline_markdown import text_to_textnodes
-from textnode import TextNode, TextType, text_node_to_html_node
+import profiling
+from htmlnode import HTMLNode, LeafNode, ParentNode
+from inline_markdown import IMAGE_PATTERN, LINK_PATTERN, text_to_textnodes
+from minify import collapse_whitespace
+from textnode import (
+    TextNode,
+    TextType,
+    text_node_to_html_node,
+    write_text_nodes_html,
+)
+
+
+HEADING_PATTERN = re.compile(r"(#{1,6}) ")
 
 
 class BlockType(Enum):
@@ -15,90 +26,208 @@ class BlockType(Enum):
 
 
 def markdown_to_blocks(markdown: str):
-    splits = markdown.split("\n\n")
-    blocks = []
-    for split in splits:
-        if split != "":
-            blocks.append(split.strip())
-    return blocks
+    return list(BlockReader(markdown.split("\n")))
+
+
+class BlockReader:
+    # Reads blocks lazily from any iterable of lines (such as an open file),
+    # noting the title and first paragraph as they go past.
+    def __init__(self, lines):
+        self.lines = iter(lines)
+        self.buffer = deque()
+        self.title = None
+        self.first_paragraph = None
+
+    def __iter__(self):
+        while True:
+            if self.buffer:
+                yield self.buffer.popleft()
+                continue
+            block = self.read_block()
+            if block is None:
+                return
+            yield block
+
+    def read_block(self) -> str | None:
+        with profiling.stage("split"):
+            return self.split_block()
+
+    def split_block(self) -> str | None:
+        lines = []
+        fenced = False
+        for line in self.lines:
+            line = line.rstrip("\r\n")
+            stripped = line.strip()
+            if not fenced and not stripped:
+                if lines:
+                    break
+                continue
+            if stripped.startswith("```") and stripped.count("```") % 2 == 1:
+                # Only a fence that opens a block starts a code block, as
+                # in block_to_block_type; one inside a paragraph or list
+                # item must not swallow the blank lines after it.
+                if fenced or not lines:
+                    fenced = not fenced
+            elif not fenced and self.title is None and line.startswith("# "):
+                self.title = line[2:]
+            lines.append(line)
+        if not lines:
+            return None
+        block = "\n".join(lines).strip()
+        if (
+            self.first_paragraph is None
+            and block_to_block_type(block) == BlockType.PARAGRAPH
+            and has_prose(block)
+        ):
+            self.first_paragraph = block
+        return block
+
+    def read_until(self, done) -> bool:
+        # Buffers blocks until done() holds; they are still yielded later.
+        while not done():
+            block = self.read_block()
+            if block is None:
+                return False
+            self.buffer.append(block)
+        return True
+
+    def read_title(self) -> str:
+        if not self.read_until(lambda: self.title is not None):
+            raise ValueError("no title found")
+        return self.title
+
+    def read_description(self) -> str:
+        if not self.read_until(lambda: self.first_paragraph is not None):
+            return ""
+        return paragraph_text(self.first_paragraph)
 
 
 def block_to_block_type(block: str) -> BlockType:
-    if re.findall(r"^(#{1,6}) ", block):
-        return BlockType.HEADING
-    if re.findall(r"^```(?:\n[\s\S]*?)?\n```$", block):
-        return BlockType.CODE
+    return classify_block(block)[0]
+
+
+def classify_block(block: str) -> tuple[BlockType, list[str] | None]:
+    # Dispatches on the first character and splits the block into lines at
+    # most once; the lines are handed on to the *_to_html_node functions.
+    first = block[:1]
+    if first == "#" and HEADING_PATTERN.match(block):
+        return BlockType.HEADING, None
+    if (
+        first == "`"
+        and len(block) >= 7
+        and block.startswith("```\n")
+        and block.endswith("\n```")
+    ):
+        return BlockType.CODE, None
 
     lines = block.split("\n")
 
-    if block.startswith(">"):
+    if first == ">":
         for line in lines:
             if not line.startswith(">"):
-                return BlockType.PARAGRAPH
-        return BlockType.QUOTE
-    if block.startswith("- "):
+                return BlockType.PARAGRAPH, lines
+        return BlockType.QUOTE, lines
+    if first == "-" and block.startswith("- "):
         for line in lines:
             if not line.startswith("- "):
-                return BlockType.PARAGRAPH
-        return BlockType.UNORDERED_LIST
-    if block.startswith("1. "):
+                return BlockType.PARAGRAPH, lines
+        return BlockType.UNORDERED_LIST, lines
+    if first == "1" and block.startswith("1. "):
         i = 1
         for line in lines:
             if not line.startswith(f"{i}. "):
-                return BlockType.PARAGRAPH
+                return BlockType.PARAGRAPH, lines
             i += 1
-        return BlockType.ORDERED_LIST
-    return BlockType.PARAGRAPH
+        return BlockType.ORDERED_LIST, lines
+    return BlockType.PARAGRAPH, lines
 
 
-def markdown_to_html_node(markdown: str):
+def markdown_to_html_node(markdown: str, cache=None, context=None):
     blocks = markdown_to_blocks(markdown)
-    children = []
-    for block in blocks:
-        html_node = block_to_html_node(block)
-        children.append(html_node)
+    if cache is None:
+        children = [block_to_html_node(block, context) for block in blocks]
+    else:
+        children = [
+            LeafNode(None, html) for html in blocks_to_html(blocks, cache, context)
+        ]
     return ParentNode("div", children)
 
 
-def block_to_html_node(block: str) -> HTMLNode:
-    block_type = block_to_block_type(block)
+def blocks_to_html(blocks, cache=None, context=None):
+    for block in blocks:
+        if cache is None:
+            yield block_to_html(block, context)
+            continue
+        key = cache.key(block, context.fingerprint if context else "")
+        html = cache.get(key)
+        if html is None:
+            html = block_to_html(block, context)
+            cache.put(key, html)
+        yield html
+
+
+def block_to_html(block: str, context=None) -> str:
+    with profiling.stage("render"):
+        html_node = block_to_html_node(block, context)
+    with profiling.stage("serialize"):
+        return html_node.to_html()
+
+
+def block_to_html_node(block: str, context=None) -> HTMLNode:
+    with profiling.stage("classify"):
+        block_type, lines = classify_block(block)
     match block_type:
         case BlockType.PARAGRAPH:
-            return paragraph_to_html_node(block)
+            return paragraph_to_html_node(block, context, lines)
         case BlockType.HEADING:
-            return heading_to_html_node(block)
+            return heading_to_html_node(block, context)
         case BlockType.CODE:
             return code_to_html_node(block)
         case BlockType.ORDERED_LIST:
-            return ordered_list_to_html_node(block)
+            return ordered_list_to_html_node(block, context, lines)
         case BlockType.UNORDERED_LIST:
-            return unordered_list_to_html_node(block)
+            return unordered_list_to_html_node(block, context, lines)
         case BlockType.QUOTE:
-            return quote_to_html_node(block)
+            return quote_to_html_node(block, context, lines)
         case _:
             raise Exception("Unknown block_type")
 
 
-def text_to_children(text: str) -> list[HTMLNode]:
-    text_nodes = text_to_textnodes(text)
+def text_to_children(text: str, context=None) -> list[HTMLNode]:
+    if context is not None and context.minify:
+        text = collapse_whitespace(text)
+    if context is not None and not context.inline_nodes:
+        return [LeafNode(None, text_to_html(text, context))]
+    with profiling.stage("inline"):
+        text_nodes = text_to_textnodes(text)
     children = []
     for text_node in text_nodes:
-        html_node = text_node_to_html_node(text_node)
+        html_node = text_node_to_html_node(text_node, context)
         children.append(html_node)
     return children
 
 
-def paragraph_to_html_node(block: str) -> HTMLNode:
-    lines = block.split("\n")
+def text_to_html(text: str, context=None) -> str:
+    with profiling.stage("inline"):
+        text_nodes = text_to_textnodes(text)
+    with profiling.stage("serialize"):
+        out = []
+        write_text_nodes_html(text_nodes, out, context)
+        return "".join(out)
+
+
+def paragraph_to_html_node(block: str, context=None, lines=None) -> HTMLNode:
+    if lines is None:
+        lines = block.split("\n")
     paragraph = " ".join(lines)
-    children = text_to_children(paragraph)
+    children = text_to_children(paragraph, context)
     return ParentNode("p", children)
 
 
-def heading_to_html_node(block: str) -> HTMLNode:
-    parts = re.findall(r"^(#{1,6}) ", block)
-    level, text = len(parts[0]), block[len(parts[0]) + 1 :]
-    return ParentNode(f"h{level}", text_to_children(text))
+def heading_to_html_node(block: str, context=None) -> HTMLNode:
+    hashes = HEADING_PATTERN.match(block)[1]
+    level, text = len(hashes), block[len(hashes) + 1 :]
+    return ParentNode(f"h{level}", text_to_children(text, context))
 
 
 def code_to_html_node(block: str) -> HTMLNode:
@@ -109,30 +238,31 @@ def code_to_html_node(block: str) -> HTMLNode:
     return ParentNode("pre", [code])
 
 
-def ordered_list_to_html_node(block: str) -> HTMLNode:
+def ordered_list_to_html_node(block: str, context=None, lines=None) -> HTMLNode:
     return ParentNode(
         "ol",
         [
-            ParentNode("li", text_to_children(line.split(". ", 1)[1]))
-            for line in block.split("\n")
+            ParentNode("li", text_to_children(line.split(". ", 1)[1], context))
+            for line in (lines if lines is not None else block.split("\n"))
         ],
     )
 
 
-def unordered_list_to_html_node(block: str) -> HTMLNode:
+def unordered_list_to_html_node(block: str, context=None, lines=None) -> HTMLNode:
     return ParentNode(
         "ul",
         [
-            ParentNode("li", text_to_children(line[2:].strip()))
-            for line in block.split("\n")
+            ParentNode("li", text_to_children(line[2:].strip(), context))
+            for line in (lines if lines is not None else block.split("\n"))
         ],
     )
 
 
-def quote_to_html_node(block: str) -> HTMLNode:
-    lines = block.split("\n")
+def quote_to_html_node(block: str, context=None, lines=None) -> HTMLNode:
+    if lines is None:
+        lines = block.split("\n")
     quote = " ".join(line[1:].strip() for line in lines)
-    return ParentNode("blockquote", text_to_children(quote))
+    return ParentNode("blockquote", text_to_children(quote, context))
 
 
 def extract_title(markdown: str) -> str:
@@ -141,3 +271,19 @@ def extract_title(markdown: str) -> str:
         if line.startswith("# "):
             return line[2:]
     raise ValueError("no title found")
+
+
+def has_prose(block: str) -> bool:
+    # A paragraph of nothing but links and images, such as a "Back Home"
+    # link, says nothing about the page. Only the link patterns are matched
+    # here, so inline syntax errors still surface when the block renders.
+    return bool(LINK_PATTERN.sub("", IMAGE_PATTERN.sub("", block)).strip())
+
+
+def paragraph_text(block: str) -> str:
+    text = " ".join(block.split("\n"))
+    return "".join(
+        node.text
+        for node in text_to_textnodes(text)
+        if node.text_type != TextType.IMAGE
+    )
@@ -0,0 +1,84 @@
+import json
+import logging
+import logging.handlers
+import sys
+import time
+
+log = logging.getLogger("site")
+
+# Handler printing to the terminal, once configure() has run.
+console = None
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "message": record.getMessage(),
+        }
+        # Structured fields are passed as extra={"fields": {...}}.
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry)
+
+
+def configure(level=logging.INFO, log_file=None, stream=None, buffer_size=1024):
+    global console
+    for handler in list(log.handlers):
+        log.removeHandler(handler)
+        handler.close()
+    console = logging.StreamHandler(stream if stream is not None else sys.stdout)
+    console.setLevel(level)
+    console.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(console)
+    if log_file is not None:
+        # Records are written in batches rather than one syscall per page;
+        # logging's exit hook flushes whatever is left.
+        target = logging.FileHandler(log_file, "w")
+        target.setFormatter(JsonLinesFormatter())
+        log.addHandler(
+            logging.handlers.MemoryHandler(
+                buffer_size, flushLevel=logging.ERROR, target=target
+            )
+        )
+        log.setLevel(logging.DEBUG)
+    else:
+        log.setLevel(level)
+    log.propagate = False
+
+
+def fields(**values) -> dict:
+    return {"fields": values}
+
+
+class Progress:
+    def __init__(self, total: int, label: str = "pages", stream=None, interval=0.1):
+        self.total = total
+        self.label = label
+        self.stream = stream if stream is not None else sys.stderr
+        self.interval = interval
+        self.done = 0
+        self.shown = 0.0
+        # A live counter only makes sense on a terminal, and only when the
+        # console isn't already printing a line per page.
+        self.enabled = (
+            total > 0
+            and console is not None
+            and console.level == logging.INFO
+            and self.stream.isatty()
+        )
+
+    def advance(self, count: int = 1):
+        self.done += count
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if now - self.shown >= self.interval or self.done == self.total:
+            self.shown = now
+            self.stream.write(f"\r{self.done}/{self.total} {self.label}")
+            self.stream.flush()
+
+    def finish(self):
+        if self.enabled and self.shown:
+            self.stream.write("\r\033[K")
+            self.stream.flush()
@@ -0,0 +1,102 @@
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from writer import load_json_state, save_json_state, write_if_changed
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    ".html",
+    ".css",
+    ".js",
+    ".svg",
+    ".xml",
+    ".json",
+    ".txt",
+)
+
+# Every suffix sidecar_encoders() can produce, brotli or not.
+SIDECAR_SUFFIXES = (".gz", ".br")
+
+
+def sidecar_encoders() -> dict:
+    encoders = {
+        # mtime=0 keeps the output byte-identical across builds.
+        ".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0),
+    }
+    if brotli is not None:
+        encoders[".br"] = lambda data: brotli.compress(data, quality=11)
+    return encoders
+
+
+def compress_file(path: str, encoders: dict, min_size: int) -> list[str]:
+    with open(path, "rb") as f:
+        data = f.read()
+    written = []
+    for suffix, encode in encoders.items():
+        sidecar = path + suffix
+        compressed = encode(data) if len(data) >= min_size else None
+        if compressed is None or len(compressed) >= len(data):
+            # Not worth serving; drop any sidecar left from an older version.
+            if os.path.exists(sidecar):
+                os.remove(sidecar)
+            continue
+        write_if_changed(sidecar, compressed)
+        written.append(suffix)
+    return written
+
+
+def compress_outputs(
+    root: str,
+    state_path: str | None = None,
+    jobs: int = 0,
+    min_size: int = 256,
+) -> tuple[int, int]:
+    encoders = sidecar_encoders()
+    state = load_json_state(state_path, {})
+    # Installing or removing brotli changes which sidecars every file needs.
+    previous = state.get("files", {}) if state.get("encoders") == list(encoders) else {}
+    current = {}
+    changed = []
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if not filename.endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            path = os.path.join(dirpath, filename)
+            st = os.stat(path)
+            stat = [st.st_size, st.st_mtime_ns]
+            # The writer leaves identical outputs untouched, so an unchanged
+            # size and mtime means the sidecars are still current, as long
+            # as nothing wiped them since.
+            entry = previous.get(path)
+            if (
+                entry is not None
+                and entry[:2] == stat
+                and all(os.path.exists(path + suffix) for suffix in entry[2])
+            ):
+                current[path] = entry
+            else:
+                changed.append(path)
+                current[path] = stat
+
+    # zlib and brotli release the GIL, so threads compress in parallel.
+    workers = jobs if jobs > 0 else os.cpu_count() or 1
+    with ThreadPoolExecutor(workers) as executor:
+        written = executor.map(
+            lambda path: compress_file(path, encoders, min_size), changed
+        )
+        for path, suffixes in zip(changed, written):
+            current[path] = current[path] + [suffixes]
+
+    for path in previous.keys() - current.keys():
+        for suffix in encoders:
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    if state_path is not None:
+        save_json_state(state_path, {"encoders": list(encoders), "files": current})
+    return len(changed), len(current) - len(changed)
+
@@ -1,6 +1,10 @@
+import filecmp
 import os
 import shutil
 
+from manifest import file_digest
+from writer import load_json_state, save_json_state
+
 
 def init_public(src: str = "static", dst: str = "public"):
     dirs = [(src, dst)]
@@ -19,3 +23,110 @@ def init_public(src: str = "static", dst: str = "public"):
                         os.mkdir(dst_path)
                 elif os.path.isfile(src_path):
                     shutil.copy2(src_path, dst_path)
+
+
+def sync_public(
+    src: str = "static",
+    dst: str = "public",
+    state_path: str | None = None,
+    checksum: bool = False,
+):
+    previous = load_json_state(state_path, [])
+    synced = []
+    copied = 0
+    dirs = [(src, dst)] if os.path.exists(src) else []
+    os.makedirs(dst, exist_ok=True)
+    while dirs:
+        current_src, current_dst = dirs.pop()
+        with os.scandir(current_src) as entries:
+            for entry in entries:
+                dst_path = os.path.join(current_dst, entry.name)
+                if entry.is_dir():
+                    dirs.append((entry.path, dst_path))
+                    os.makedirs(dst_path, exist_ok=True)
+                elif entry.is_file():
+                    synced.append(dst_path)
+                    if not is_current(entry, dst_path, checksum):
+                        shutil.copy2(entry.path, dst_path)
+                        copied += 1
+
+    deleted = 0
+    for dst_path in sorted(set(previous) - set(synced)):
+        if os.path.isfile(dst_path):
+            os.remove(dst_path)
+            deleted += 1
+            remove_empty_dirs(os.path.dirname(dst_path), dst)
+    if state_path is not None:
+        save_json_state(state_path, sorted(synced))
+    return copied, deleted
+
+
+def fingerprint_assets(
+    src: str = "static",
+    dst: str = "public",
+    manifest=None,
+    state_path: str | None = None,
+    length: int = 8,
+) -> dict[str, str]:
+    # Each asset gets a copy named after its content, e.g. index.3f2a9c1d.css,
+    # which can be cached forever. The plain copy stays for anything that
+    # refers to it outside rendered pages (stylesheet url()s, old links).
+    previous = load_json_state(state_path, {})
+    assets = {}
+    dirs = [src] if os.path.exists(src) else []
+    while dirs:
+        current = dirs.pop()
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    dirs.append(entry.path)
+                    continue
+                if not entry.is_file() or entry.name.startswith("."):
+                    continue
+                if manifest is not None:
+                    digest = manifest.digest(entry.path)
+                else:
+                    digest = file_digest(entry.path)
+                rel_path = os.path.relpath(entry.path, src)
+                root, ext = os.path.splitext(rel_path)
+                hashed_path = f"{root}.{digest[:length]}{ext}"
+                dst_path = os.path.join(dst, hashed_path)
+                if not os.path.exists(dst_path):
+                    os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+                    shutil.copy2(entry.path, dst_path)
+                url = "/" + rel_path.replace(os.sep, "/")
+                assets[url] = "/" + hashed_path.replace(os.sep, "/")
+
+    live = set(assets.values())
+    for hashed_url in sorted(set(previous.values()) - live):
+        dst_path = os.path.join(dst, *hashed_url.split("/"))
+        if os.path.isfile(dst_path):
+            os.remove(dst_path)
+            remove_empty_dirs(os.path.dirname(dst_path), dst)
+    if state_path is not None:
+        save_json_state(state_path, assets)
+    return assets
+
+
+def is_current(entry: os.DirEntry, dst_path: str, checksum: bool) -> bool:
+    try:
+        dst_stat = os.stat(dst_path)
+    except FileNotFoundError:
+        return False
+    src_stat = entry.stat()
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if src_stat.st_mtime_ns == dst_stat.st_mtime_ns:
+        return True
+    if not checksum or not filecmp.cmp(entry.path, dst_path, shallow=False):
+        return False
+    # Match the times too, so later builds settle it from stat() alone.
+    shutil.copystat(entry.path, dst_path)
+    return True
+
+
+def remove_empty_dirs(path: str, root: str):
+    root = os.path.abspath(root)
+    while os.path.abspath(path).startswith(root + os.sep) and not os.listdir(path):
+        os.rmdir(path)
+        path = os.path.dirname(path)
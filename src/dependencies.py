@@ -0,0 +1,92 @@
+import os
+import posixpath
+from urllib.parse import unquote, urlsplit
+
+import profiling
+from inline_markdown import extract_markdown_images, extract_markdown_links
+
+
+def safe_join(root: str, url_path: str) -> str:
+    parts = [
+        part
+        for part in posixpath.normpath(url_path).split("/")
+        if part not in ("", ".", "..")
+    ]
+    return os.path.join(root, *parts)
+
+
+def source_candidates(content_root: str, url_path: str) -> list[str]:
+    path = safe_join(content_root, url_path)
+    if url_path.endswith("/"):
+        return [os.path.join(path, "index.md")]
+    if path.endswith(".html"):
+        candidates = [path[:-5] + ".md"]
+        if os.path.basename(path) == "index.html":
+            candidates.append(os.path.join(os.path.dirname(path), "index.md"))
+        return candidates
+    return [path + ".md", os.path.join(path, "index.md")]
+
+
+def resolve_source(content_root: str, url_path: str) -> str | None:
+    for candidate in source_candidates(content_root, url_path):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def local_path(url: str, base: str) -> str | None:
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    return posixpath.join(base, unquote(parts.path))
+
+
+class PageDependencies:
+    def __init__(self, from_path: str, content_root: str, static_root=None):
+        self.content_root = content_root
+        self.static_root = static_root
+        rel_dir = os.path.dirname(os.path.relpath(from_path, content_root))
+        # Relative URLs in a page resolve against the directory it's served from.
+        self.base = "/" + rel_dir.replace(os.sep, "/") + "/" if rel_dir else "/"
+        # Inputs whose contents feed the output, and pages that only need to
+        # exist (or not) for the output to stay the same.
+        self.files = set()
+        self.pages = set()
+
+    def scan(self, block: str):
+        if block.startswith("```"):
+            return
+        if self.static_root is not None and "![" in block:
+            for _, url in extract_markdown_images(block):
+                path = local_path(url, self.base)
+                if path is not None:
+                    self.files.add(safe_join(self.static_root, path))
+        if "](" in block:
+            for _, url in extract_markdown_links(block):
+                path = local_path(url, self.base)
+                if path is not None:
+                    self.add_link(path)
+
+    def add_link(self, url_path: str):
+        if self.static_root is not None:
+            # Links to static files are rewritten to fingerprinted names,
+            # so their contents feed the output like images do.
+            static_path = safe_join(self.static_root, url_path)
+            if os.path.isfile(static_path):
+                self.files.add(static_path)
+        candidates = source_candidates(self.content_root, url_path)
+        for candidate in candidates:
+            if os.path.isfile(candidate):
+                self.pages.add(candidate)
+                return
+        # A missing target is recorded too, so creating it invalidates us.
+        self.pages.update(candidates)
+
+    def track(self, blocks):
+        for block in blocks:
+            with profiling.stage("index"):
+                self.scan(block)
+            yield block
+
+    def to_dict(self) -> dict:
+        return {"files": sorted(self.files), "pages": sorted(self.pages)}
@@ -0,0 +1,131 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+EVICTION_POLICIES = ("lru", "fifo")
+
+
+class FragmentCache:
+    def __init__(
+        self,
+        path: str | None = None,
+        max_entries: int = 4096,
+        max_disk_entries: int | None = None,
+        policy: str = "lru",
+        namespace: str = "",
+    ):
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {policy}")
+        self.path = path
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.policy = policy
+        self.namespace = namespace
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # The dev server renders on several threads at once; disk reads and
+        # writes happen outside the lock.
+        self.lock = threading.Lock()
+
+    def __getstate__(self):
+        # Pool workers each get a copy, and locks can't be pickled.
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def key(self, block: str, salt: str = "") -> str:
+        text = f"{self.namespace}\0{salt}\0{block}"
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        with self.lock:
+            html = self.memory.get(key)
+            if html is not None:
+                if self.policy == "lru":
+                    self.memory.move_to_end(key)
+                self.hits += 1
+                return html
+        if self.path is not None:
+            html = self.read(key)
+            if html is not None:
+                self.remember(key, html)
+                with self.lock:
+                    self.hits += 1
+                return html
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, html: str):
+        self.remember(key, html)
+        if self.path is not None:
+            self.write(key, html)
+
+    def remember(self, key: str, html: str):
+        if self.max_entries <= 0:
+            return
+        with self.lock:
+            self.memory[key] = html
+            while len(self.memory) > self.max_entries:
+                self.memory.popitem(last=False)
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], key)
+
+    def read(self, key: str) -> str | None:
+        path = self.entry_path(key)
+        try:
+            with open(path, "r") as f:
+                html = f.read()
+        except FileNotFoundError:
+            return None
+        if self.policy == "lru":
+            # The mtime doubles as the last-used time for disk eviction.
+            os.utime(path)
+        return html
+
+    def write(self, key: str, html: str):
+        path = self.entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique temp name so workers and threads never clobber each other.
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(html)
+        os.replace(tmp_path, path)
+
+    def prune(self) -> int:
+        if self.path is None or self.max_disk_entries is None:
+            return 0
+        if not os.path.isdir(self.path):
+            return 0
+        entries = []
+        for shard in os.scandir(self.path):
+            if shard.is_dir():
+                for entry in os.scandir(shard.path):
+                    entries.append((entry.stat().st_mtime_ns, entry.path))
+        excess = len(entries) - self.max_disk_entries
+        if excess <= 0:
+            return 0
+        entries.sort()
+        for _, path in entries[:excess]:
+            os.remove(path)
+        return excess
+
+    def add_stats(self, hits: int, misses: int):
+        with self.lock:
+            self.hits += hits
+            self.misses += misses
+
+    def report(self) -> str:
+        total = self.hits + self.misses
+        rate = 100 * self.hits / total if total else 0
+        return (
+            f"Fragment cache: {self.hits} hits, {self.misses} misses "
+            f"({rate:.0f}% hit rate)"
+        )
@@ -0,0 +1,67 @@
+import os
+from datetime import datetime, timezone
+
+DELIMITER = "---"
+
+
+def parse_value(value: str):
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    if value.startswith("[") and value.endswith("]"):
+        return [parse_value(item) for item in value[1:-1].split(",") if item.strip()]
+    lowered = value.lower()
+    if lowered in ("true", "yes"):
+        return True
+    if lowered in ("false", "no"):
+        return False
+    return value
+
+
+def parse_front_matter(lines) -> dict:
+    # Flat "key: value" pairs only; enough for titles, dates, tags and drafts.
+    values = {}
+    for number, line in enumerate(lines, 2):
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        key, sep, value = stripped.partition(":")
+        if not sep or not key.strip():
+            raise ValueError(f"invalid front matter on line {number}: {stripped}")
+        values[key.strip()] = parse_value(value)
+    return values
+
+
+def read_front_matter(f) -> dict:
+    # Reads only the header, leaving f at the first line of the body.
+    if f.readline().rstrip("\r\n") != DELIMITER:
+        f.seek(0)
+        return {}
+    lines = []
+    for line in iter(f.readline, ""):
+        if line.rstrip("\r\n") == DELIMITER:
+            return parse_front_matter(lines)
+        lines.append(line)
+    raise ValueError("front matter is never closed")
+
+
+def scan_front_matter(path: str) -> dict:
+    with open(path, "r") as f:
+        return read_front_matter(f)
+
+
+def is_draft(front_matter: dict) -> bool:
+    return front_matter.get("draft") is True
+
+
+def page_date(from_path: str, front_matter: dict) -> float:
+    value = front_matter.get("date")
+    if value is None:
+        return os.path.getmtime(from_path)
+    try:
+        date = datetime.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError(f"invalid date: {value}") from None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return date.timestamp()
@@ -1,39 +1,486 @@
+import collections
+import html
+import io
+import itertools
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-from block_markdown import markdown_to_html_node, extract_title
+import profiling
+from buildlog import Progress, fields, log
+from compress import SIDECAR_SUFFIXES
+from copystatic import remove_empty_dirs
+from dependencies import PageDependencies
+from frontmatter import is_draft, page_date, read_front_matter, scan_front_matter
+from block_markdown import BlockReader, blocks_to_html
+from rendercontext import RenderContext
+from sitedata import PageMeta, page_url, write_site_files
+from template import Template
+from writer import OutputWriter
 
 
-def generate_page(from_path, template_path, dest_path, basepath):
-    print(
-        f"Generating page from {from_path} to {dest_path} using template {template_path}"
-    )
+def generate_page(
+    from_path,
+    template,
+    dest_path,
+    context,
+    cache=None,
+    content_root=None,
+    writer=None,
+    deps=None,
+    meta=None,
+):
+    if writer is None:
+        # A lone page still goes through a writer, so it is swapped in whole
+        # and a failed render leaves the old output in place.
+        with OutputWriter(0) as writer:
+            return generate_page(
+                from_path,
+                template,
+                dest_path,
+                context,
+                cache,
+                content_root,
+                writer,
+                deps,
+                meta,
+            ).result()
+    if profiling.active is None:
+        # The page streams into a temp file, which the writer's threads
+        # compare with the old output before swapping it in; the returned
+        # future says whether the file had to be rewritten.
+        f = writer.create(dest_path)
+        try:
+            with f:
+                write_page(
+                    from_path, template, f, context, cache, content_root, deps, meta
+                )
+        except BaseException:
+            os.remove(f.name)
+            raise
+        return writer.commit(f.name, dest_path)
+    # Profiled pages are rendered to memory so writing is timed apart.
+    with profiling.page(from_path):
+        html = render_page(
+            from_path, template, context, cache, content_root, deps, meta
+        )
+        with profiling.stage("write"):
+            return writer.submit(dest_path, html)
+
+
+def render_page(
+    from_path, template, context, cache=None, content_root=None, deps=None, meta=None
+) -> str:
+    stream = io.StringIO()
+    write_page(from_path, template, stream, context, cache, content_root, deps, meta)
+    return stream.getvalue()
+
+
+def write_page(
+    from_path,
+    template,
+    stream,
+    context,
+    cache=None,
+    content_root=None,
+    deps=None,
+    meta=None,
+):
     with open(from_path, "r") as f:
-        markdown = f.read()
-        f.close()
-    html_node = markdown_to_html_node(markdown)
-    title = extract_title(markdown)
-    with open(template_path, "r") as f:
-        template = f.read()
-        f.close()
-    html = template.replace("{{ Title }}", title).replace(
-        "{{ Content }}", html_node.to_html()
-    )
-    html = html.replace('href="/', f'href="{basepath}/').replace(
-        'src="/', f'src="{basepath}/'
-    )
-    dir = os.path.dirname(dest_path)
-    os.makedirs(dir, exist_ok=True)
-    with open(dest_path, "w") as f:
-        f.write(html)
-        f.close()
+        front_matter = read_front_matter(f)
+        if profiling.active is None:
+            reader = BlockReader(f)
+        else:
+            with profiling.stage("read"):
+                reader = BlockReader(f.read().split("\n"))
+        blocks = reader if deps is None else deps.track(reader)
+        if meta is not None:
+            blocks = meta.track(blocks)
+        title = front_matter.get("title")
+        values = {
+            "Title": reader.read_title if title is None else str(title),
+            "Content": itertools.chain(
+                ["<div>"], blocks_to_html(blocks, cache, context), ["</div>"]
+            ),
+        }
+        if template.uses("Date"):
+            date = page_date(from_path, front_matter)
+            values["Date"] = time.strftime("%Y-%m-%d", time.gmtime(date))
+        if template.uses("Description"):
+            description = front_matter.get("description")
+            if description is None:
+                values["Description"] = lambda: html.escape(reader.read_description())
+            else:
+                values["Description"] = html.escape(str(description))
+        if template.uses("Nav") and content_root is not None:
+            values["Nav"] = breadcrumbs(from_path, content_root, context, deps)
+        with profiling.stage("template"):
+            template.write(stream, values)
+        if title is None and reader.title is None:
+            raise ValueError("no title found")
+        if meta is not None:
+            meta.read(reader, front_matter)
+
+
+def breadcrumbs(from_path, content_root, context, deps=None):
+    rel_dir, name = os.path.split(os.path.relpath(from_path, content_root))
+    parts = rel_dir.split(os.sep) if rel_dir else []
+    if name == "index.md" and parts:
+        parts.pop()
+    links = [f'<a href="{context.resolve_url("/")}">Home</a>']
+    for i, part in enumerate(parts):
+        url = context.resolve_url("/" + "/".join(parts[: i + 1]))
+        index_path = os.path.join(content_root, *parts[: i + 1], "index.md")
+        if deps is not None:
+            deps.pages.add(index_path)
+        if os.path.isfile(index_path):
+            links.append(f'<a href="{url}">{html.escape(part)}</a>')
+        else:
+            links.append(html.escape(part))
+    return f"<nav>{' / '.join(links)}</nav>"
 
 
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
-    for entry in os.listdir(dir_path_content):
+def find_pages(dir_path_content, dest_dir_path):
+    pages = []
+    for entry in sorted(os.listdir(dir_path_content)):
         from_path = os.path.join(dir_path_content, entry)
         dest_path = os.path.join(dest_dir_path, entry)
         if os.path.isfile(from_path) and entry.endswith(".md"):
-            dest_path = dest_path[:-3] + ".html"
-            generate_page(from_path, template_path, dest_path, basepath)
+            pages.append((from_path, dest_path[:-3] + ".html"))
         elif os.path.isdir(from_path):
-            generate_pages_recursive(from_path, template_path, dest_path, basepath)
+            pages.extend(find_pages(from_path, dest_path))
+    return pages
+
+
+def split_drafts(pages, manifest=None):
+    kept = []
+    drafts = []
+    for from_path, dest_path in pages:
+        # Only each file's header is read; draft bodies are never parsed.
+        try:
+            if manifest is not None:
+                front_matter = manifest.front_matter(from_path)
+            else:
+                front_matter = scan_front_matter(from_path)
+        except ValueError:
+            # Rendering the page reports the broken header as its error.
+            front_matter = {}
+        if is_draft(front_matter):
+            drafts.append(dest_path)
+        else:
+            kept.append((from_path, dest_path))
+    return kept, drafts
+
+
+def remove_outputs(dest_paths, dest_dir_path):
+    root = os.path.abspath(dest_dir_path)
+    for dest_path in dest_paths:
+        # The manifest may also hold pages built into another directory.
+        if not os.path.abspath(dest_path).startswith(root + os.sep):
+            continue
+        for path in (dest_path, *(dest_path + suffix for suffix in SIDECAR_SUFFIXES)):
+            if os.path.isfile(path):
+                os.remove(path)
+                log.debug("Removed %s", path, extra=fields(dest=path))
+        if os.path.isdir(os.path.dirname(dest_path)):
+            remove_empty_dirs(os.path.dirname(dest_path), dest_dir_path)
+
+
+class BuildError(Exception):
+    def __init__(self, failures: list[tuple[str, str]]):
+        self.failures = failures
+        details = "".join(f"\n  {path}: {error}" for path, error in failures)
+        super().__init__(f"{len(failures)} page(s) failed to build:{details}")
+
+
+worker_cache = None
+
+
+def init_worker(cache):
+    global worker_cache
+    worker_cache = cache
+
+
+def render_batch(
+    batch,
+    template,
+    context,
+    cache=None,
+    content_root=None,
+    report=None,
+    static_root=None,
+):
+    if cache is None:
+        cache = worker_cache
+    if cache is not None:
+        hits, misses = cache.hits, cache.misses
+    results = []
+    # Pages whose file may still be in flight, in render order.
+    outputs = collections.deque()
+
+    def drain(wait):
+        while outputs and (wait or outputs[0][4] is None or outputs[0][4].done()):
+            from_path, dest_path, seconds, error, future, deps, meta = (
+                outputs.popleft()
+            )
+            written = None
+            if future is not None:
+                try:
+                    written = future.result()
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+            result = (from_path, error, seconds, written, deps, meta)
+            results.append(result)
+            if report is not None:
+                report(dest_path, *result)
+
+    # Profiled builds write synchronously so the write stage is timed.
+    workers = 0 if profiling.active is not None else 4
+    with OutputWriter(workers) as writer:
+        writer.make_dirs(dest_path for _, dest_path in batch)
+        for from_path, dest_path in batch:
+            start = time.perf_counter()
+            error = future = deps = meta = None
+            if content_root is not None:
+                deps = PageDependencies(from_path, content_root, static_root)
+                meta = PageMeta(from_path)
+            try:
+                future = generate_page(
+                    from_path,
+                    template,
+                    dest_path,
+                    context,
+                    cache,
+                    content_root,
+                    writer,
+                    deps,
+                    meta,
+                )
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            seconds = time.perf_counter() - start
+            if deps is not None:
+                deps = deps.to_dict()
+            if meta is not None:
+                meta = None if error else meta.to_dict()
+            outputs.append((from_path, dest_path, seconds, error, future, deps, meta))
+            drain(wait=False)
+    drain(wait=True)
+    if cache is None:
+        return results, (0, 0)
+    return results, (cache.hits - hits, cache.misses - misses)
+
+
+def render_pages(
+    pages,
+    template,
+    context,
+    jobs=1,
+    cache=None,
+    content_root=None,
+    report=None,
+    static_root=None,
+    mp_context=None,
+):
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    if jobs == 1 or len(pages) < 2:
+        results, _ = render_batch(
+            pages, template, context, cache, content_root, report, static_root
+        )
+        return results
+    # A few batches per worker keeps the pool busy without paying the
+    # pickling round trip for every single page.
+    size = max(1, min(64, len(pages) // (jobs * 4)))
+    batches = [pages[i : i + size] for i in range(0, len(pages), size)]
+    results = []
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        mp_context=mp_context,
+        initializer=init_worker,
+        initargs=(cache,),
+    ) as executor:
+        futures = [
+            executor.submit(
+                render_batch,
+                batch,
+                template,
+                context,
+                None,
+                content_root,
+                None,
+                static_root,
+            )
+            for batch in batches
+        ]
+        for batch, future in zip(batches, futures):
+            try:
+                batch_results, (hits, misses) = future.result()
+                if cache is not None:
+                    cache.add_stats(hits, misses)
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                batch_results = [
+                    (from_path, error, 0.0, None, None, None) for from_path, _ in batch
+                ]
+            results.extend(batch_results)
+            # Workers don't log; their pages are reported here as batches land.
+            if report is not None:
+                for (_, dest_path), result in zip(batch, batch_results):
+                    report(dest_path, *result)
+    return results
+
+
+def build_context(basepath, assets=None, images=None, minify=False):
+    # The watcher and dev server render with these too, so a page they
+    # re-render matches the rest of the build.
+    return RenderContext(
+        basepath,
+        inline_nodes=False,
+        assets=assets,
+        images=images.images if images is not None else None,
+        minify=minify,
+    )
+
+
+def generate_pages_recursive(
+    dir_path_content,
+    template_path,
+    dest_dir_path,
+    basepath,
+    manifest=None,
+    incremental=False,
+    jobs=1,
+    cache=None,
+    dir_path_static=None,
+    assets=None,
+    images=None,
+    minify=False,
+    drafts=False,
+    site_url=None,
+    site_author=None,
+):
+    pages = find_pages(dir_path_content, dest_dir_path)
+    if not drafts:
+        pages, skipped = split_drafts(pages, manifest)
+        if skipped:
+            # A page that went back to being a draft must not stay published.
+            remove_outputs(skipped, dest_dir_path)
+            log.info(
+                "Skipped %d draft(s)",
+                len(skipped),
+                extra=fields(drafts=len(skipped)),
+            )
+    context = build_context(basepath, assets, images, minify)
+    template = Template.load(template_path, context)
+    # Fingerprinted names the template links to; images in the pages
+    # themselves are covered by their recorded dependencies.
+    template_assets = None
+    if assets is not None:
+        template_assets = {url: assets[url] for url in template.urls if url in assets}
+    pending = []
+    inputs = {}
+    for from_path, dest_path in pages:
+        if manifest is not None:
+            inputs[dest_path] = manifest.page_inputs(from_path, template_path, basepath)
+            inputs[dest_path]["assets"] = template_assets
+            # Which images a page shows is in its dependencies; how they are
+            # processed is the same for every page.
+            inputs[dest_path]["images"] = images.settings if images else None
+            inputs[dest_path]["minify"] = minify
+            if incremental and manifest.is_fresh(dest_path, inputs[dest_path]):
+                continue
+        pending.append((from_path, dest_path))
+
+    progress = Progress(len(pending))
+
+    def report(dest_path, from_path, error, seconds, written, deps, meta):
+        progress.advance()
+        page_fields = fields(
+            page=from_path,
+            dest=dest_path,
+            ms=round(seconds * 1000, 3),
+            written=written,
+            error=error,
+        )
+        if error is None:
+            log.debug(
+                "Generated %s -> %s%s",
+                from_path,
+                dest_path,
+                "" if written else " (unchanged)",
+                extra=page_fields,
+            )
+        else:
+            log.debug("Failed %s: %s", from_path, error, extra=page_fields)
+
+    start = time.perf_counter()
+    results = render_pages(
+        pending,
+        template,
+        context,
+        jobs,
+        cache,
+        dir_path_content,
+        report,
+        dir_path_static,
+    )
+    elapsed = time.perf_counter() - start
+    progress.finish()
+    failures = [(result[0], result[1]) for result in results if result[1]]
+    unchanged = sum(1 for result in results if result[3] is False)
+
+    # Pages skipped as fresh still belong in the sitemap, feed and index,
+    # with the metadata recorded when they were last rendered.
+    site_pages = {}
+    if manifest is not None:
+        for dest_path in inputs:
+            site_pages[dest_path] = manifest.pages.get(dest_path, {}).get("meta")
+        for (_, dest_path), (_, error, _, _, deps, meta) in zip(pending, results):
+            if error is None:
+                manifest.record(dest_path, inputs[dest_path], deps, meta)
+        removed = manifest.prune(dest_path for _, dest_path in pages)
+        remove_outputs(removed, dest_dir_path)
+        manifest.save()
+    for (_, dest_path), result in zip(pending, results):
+        site_pages[dest_path] = result[5]
+    with profiling.stage("site files"):
+        write_site_files(
+            {
+                page_url(dest_path, dest_dir_path): meta
+                for dest_path, meta in site_pages.items()
+                if meta is not None
+            },
+            context,
+            dest_dir_path,
+            site_url,
+            site_author=site_author,
+        )
+    log.info(
+        "Generated %d page(s) in %.2fs, %d unchanged on disk",
+        len(pending) - len(failures),
+        elapsed,
+        unchanged,
+        extra=fields(
+            pages=len(pages),
+            rendered=len(pending) - len(failures),
+            unchanged=unchanged,
+            failed=len(failures),
+            seconds=round(elapsed, 3),
+        ),
+    )
+    if incremental:
+        log.info(
+            "%d of %d pages up to date",
+            len(pages) - len(pending),
+            len(pages),
+            extra=fields(fresh=len(pages) - len(pending), pages=len(pages)),
+        )
+    if cache is not None:
+        cache.prune()
+        log.info(
+            cache.report(),
+            extra=fields(cache_hits=cache.hits, cache_misses=cache.misses),
+        )
+    if failures:
+        raise BuildError(failures)
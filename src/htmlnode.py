@@ -1,4 +1,7 @@
 class HTMLNode:
+    # Pages create tens of thousands of nodes, so skip the per-instance dict.
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(
         self,
         tag: str | None = None,
@@ -9,24 +12,31 @@ class HTMLNode:
         self.tag = tag
         self.value = value
         self.children = children
-        self.props = props
+        self.props = props or None
 
     def to_html(self):
         raise NotImplementedError("to_html method not implemented")
 
+    def iter_html(self):
+        yield self.to_html()
+
+    def write_html(self, stream):
+        write = stream.write
+        for fragment in self.iter_html():
+            write(fragment)
+
     def props_to_html(self):
         if not self.props:
             return ""
-        props_str = ""
-        for key, value in self.props.items():
-            props_str += f' {key}="{value}"'
-        return props_str
+        return "".join(f' {key}="{value}"' for key, value in self.props.items())
 
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, children: {self.children}, {self.props})"
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
         self,
         tag: str | None,
@@ -47,6 +57,8 @@ class LeafNode(HTMLNode):
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
         self,
         tag: str,
@@ -56,15 +68,17 @@ class ParentNode(HTMLNode):
         super().__init__(tag, None, children, props)
 
     def to_html(self):
+        return "".join(self.iter_html())
+
+    def iter_html(self):
         if not self.tag:
             raise ValueError("ParentNode must have a tag to convert to HTML")
         if not self.children:
             raise ValueError("ParentNode must have children to convert to HTML")
-        children_html = ""
-        if self.children:
-            for child in self.children:
-                children_html += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+        yield f"<{self.tag}{self.props_to_html()}>"
+        for child in self.children:
+            yield from child.iter_html()
+        yield f"</{self.tag}>"
 
     def __repr__(self):
         return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
@@ -0,0 +1,153 @@
+import hashlib
+import os
+import shutil
+import struct
+
+from copystatic import remove_empty_dirs
+from manifest import file_digest
+from writer import load_json_state, save_json_state
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif")
+# Part of every derivative's cache key; bump when resizing output changes.
+PIPELINE_VERSION = "1"
+
+
+def image_size(path: str) -> tuple[int, int] | None:
+    # Read just enough of the header for the dimensions, no decoding.
+    with open(path, "rb") as f:
+        head = f.read(32)
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24])
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10])
+        if head.startswith(b"\xff\xd8"):
+            return jpeg_size(f)
+    return None
+
+
+def jpeg_size(f) -> tuple[int, int] | None:
+    f.seek(2)
+    while True:
+        marker = f.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        if code in (0xD8, 0x01) or 0xD0 <= code <= 0xD7:
+            continue
+        length = struct.unpack(">H", f.read(2))[0]
+        # Start-of-frame markers, except DHT, JPG and DAC which share the range.
+        if 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">xHH", f.read(5))
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def make_derivative(src_path: str, dest_path: str, width: int, quality: int):
+    with Image.open(src_path) as image:
+        height = round(image.height * width / image.width)
+        resized = image.resize((width, height), Image.LANCZOS)
+        options = {"optimize": True}
+        if dest_path.lower().endswith((".jpg", ".jpeg")):
+            options["quality"] = quality
+        tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+        resized.save(tmp_path, format=image.format, **options)
+    os.replace(tmp_path, dest_path)
+
+
+class ImagePipeline:
+    def __init__(
+        self,
+        cache_dir: str,
+        widths=(480, 960),
+        quality: int = 80,
+        manifest=None,
+    ):
+        self.cache_dir = cache_dir
+        self.widths = tuple(sorted(widths))
+        self.quality = quality
+        self.manifest = manifest
+        self.images = {}
+        self.produced = 0
+        self.reused = 0
+
+    @property
+    def settings(self) -> str:
+        widths = ",".join(str(width) for width in self.widths)
+        # Installing Pillow adds srcsets, so it must invalidate every page.
+        resize = "yes" if self.can_resize else "no"
+        return (
+            f"v{PIPELINE_VERSION};widths={widths};quality={self.quality};"
+            f"resize={resize}"
+        )
+
+    @property
+    def can_resize(self) -> bool:
+        return Image is not None
+
+    def digest(self, path: str) -> str:
+        if self.manifest is not None:
+            return self.manifest.digest(path)
+        return file_digest(path)
+
+    def process(self, src: str, dst: str, state_path=None) -> dict[str, dict]:
+        previous = load_json_state(state_path, {})
+        images = {}
+        dirs = [src] if os.path.exists(src) else []
+        while dirs:
+            current = dirs.pop()
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        dirs.append(entry.path)
+                    elif entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                        rel_path = os.path.relpath(entry.path, src)
+                        info = self.process_image(entry.path, rel_path, dst)
+                        if info is not None:
+                            images["/" + rel_path.replace(os.sep, "/")] = info
+
+        live = {url for info in images.values() for url, _ in info["srcset"]}
+        for info in previous.values():
+            for url, _ in info["srcset"]:
+                dest_path = os.path.join(dst, *url.split("/"))
+                if url not in live and os.path.isfile(dest_path):
+                    os.remove(dest_path)
+                    remove_empty_dirs(os.path.dirname(dest_path), dst)
+        if state_path is not None:
+            save_json_state(state_path, images)
+        self.images = images
+        return images
+
+    def process_image(self, path: str, rel_path: str, dst: str) -> dict | None:
+        size = image_size(path)
+        if size is None:
+            return None
+        width, height = size
+        info = {"width": width, "height": height, "srcset": []}
+        if not self.can_resize:
+            return info
+        digest = self.digest(path)
+        root, ext = os.path.splitext(rel_path)
+        for target in self.widths:
+            if target >= width:
+                break
+            key = hashlib.sha256(f"{digest};{target};{self.settings}".encode())
+            key = key.hexdigest()
+            cached = os.path.join(self.cache_dir, key[:2], key + ext)
+            if os.path.exists(cached):
+                self.reused += 1
+            else:
+                os.makedirs(os.path.dirname(cached), exist_ok=True)
+                make_derivative(path, cached, target, self.quality)
+                self.produced += 1
+            # The key is in the name, so derivatives can be cached forever.
+            derived = f"{root}.{target}w.{key[:8]}{ext}"
+            dest_path = os.path.join(dst, derived)
+            if not os.path.exists(dest_path):
+                shutil.copy2(cached, dest_path)
+            info["srcset"].append(("/" + derived.replace(os.sep, "/"), target))
+        return info
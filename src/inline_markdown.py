@@ -1,6 +1,25 @@
 import re
 from textnode import TextNode, TextType
 
+IMAGE_PATTERN = re.compile(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)")
+LINK_PATTERN = re.compile(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)")
+# One alternation for every inline construct; the leftmost match wins, so
+# delimiters inside code spans or link URLs are never mistaken for markup.
+INLINE_PATTERN = re.compile(
+    r"\*\*(?P<bold>.*?)\*\*"
+    r"|_(?P<italic>.*?)_"
+    r"|`(?P<code>.*?)`"
+    r"|!\[(?P<alt>[^\[\]]*)\]\((?P<src>[^\(\)]*)\)"
+    r"|\[(?P<text>[^\[\]]*)\]\((?P<href>[^\(\)]*)\)",
+    re.DOTALL,
+)
+INLINE_DELIMITERS = ("**", "_", "`")
+INLINE_TYPES = {
+    "bold": TextType.BOLD,
+    "italic": TextType.ITALIC,
+    "code": TextType.CODE,
+}
+
 
 def split_nodes_delimiter(old_nodes, delimiter, text_type):
     new_nodes = []
@@ -24,68 +43,65 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
 
 
 def extract_markdown_images(text):
-    return re.findall(r"!\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return IMAGE_PATTERN.findall(text)
 
 
 def extract_markdown_links(text):
-    return re.findall(r"(?<!!)\[([^\[\]]*)\]\(([^\(\)]*)\)", text)
+    return LINK_PATTERN.findall(text)
 
 
-def split_nodes_image(old_nodes):
+def split_nodes_pattern(old_nodes, pattern, text_type):
     new_nodes = []
     for old_node in old_nodes:
         if old_node.text_type != TextType.TEXT:
             new_nodes.append(old_node)
             continue
         original_text = old_node.text
-        images = extract_markdown_images(original_text)
-        if len(images) == 0:
+        position = 0
+        for match in pattern.finditer(original_text):
+            if match.start() > position:
+                new_nodes.append(
+                    TextNode(original_text[position : match.start()], TextType.TEXT)
+                )
+            new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+            position = match.end()
+        if position == 0:
             new_nodes.append(old_node)
-            continue
-        for image in images:
-            alt_text, url = image
-            sections = original_text.split(f"![{alt_text}]({url})", 1)
-            if len(sections) != 2:
-                raise ValueError("invalid markdown, image section not closed")
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(TextNode(alt_text, TextType.IMAGE, url))
-            original_text = sections[1]
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.TEXT))
+        elif position < len(original_text):
+            new_nodes.append(TextNode(original_text[position:], TextType.TEXT))
     return new_nodes
 
 
+def split_nodes_image(old_nodes):
+    return split_nodes_pattern(old_nodes, IMAGE_PATTERN, TextType.IMAGE)
+
+
 def split_nodes_links(old_nodes):
-    new_nodes = []
-    for old_node in old_nodes:
-        if old_node.text_type != TextType.TEXT:
-            new_nodes.append(old_node)
-            continue
-        original_text = old_node.text
-        links = extract_markdown_links(original_text)
-        if len(links) == 0:
-            new_nodes.append(old_node)
-            continue
-        for link in links:
-            text, url = link
-            sections = original_text.split(f"[{text}]({url})", 1)
-            if len(sections) != 2:
-                raise ValueError("invalid markdown, link section not closed")
-            if sections[0] != "":
-                new_nodes.append(TextNode(sections[0], TextType.TEXT))
-            new_nodes.append(TextNode(text, TextType.LINK, url))
-            original_text = sections[1]
-        if original_text != "":
-            new_nodes.append(TextNode(original_text, TextType.TEXT))
-    return new_nodes
+    return split_nodes_pattern(old_nodes, LINK_PATTERN, TextType.LINK)
+
+
+def plain_text_node(text: str) -> TextNode:
+    for delimiter in INLINE_DELIMITERS:
+        if delimiter in text:
+            raise ValueError(f'Unmatched delimiter "{delimiter}" in text')
+    return TextNode(text, TextType.TEXT)
 
 
 def text_to_textnodes(text: str) -> list[TextNode]:
-    text_nodes = [TextNode(text, TextType.TEXT)]
-    text_nodes = split_nodes_delimiter(text_nodes, "**", TextType.BOLD)
-    text_nodes = split_nodes_delimiter(text_nodes, "_", TextType.ITALIC)
-    text_nodes = split_nodes_delimiter(text_nodes, "`", TextType.CODE)
-    text_nodes = split_nodes_image(text_nodes)
-    text_nodes = split_nodes_links(text_nodes)
+    text_nodes = []
+    position = 0
+    for match in INLINE_PATTERN.finditer(text):
+        start = match.start()
+        if start > position:
+            text_nodes.append(plain_text_node(text[position:start]))
+        position = match.end()
+        kind = match.lastgroup
+        if kind == "src":
+            text_nodes.append(TextNode(match["alt"], TextType.IMAGE, match["src"]))
+        elif kind == "href":
+            text_nodes.append(TextNode(match["text"], TextType.LINK, match["href"]))
+        elif match[kind]:
+            text_nodes.append(TextNode(match[kind], INLINE_TYPES[kind]))
+    if position < len(text):
+        text_nodes.append(plain_text_node(text[position:]))
     return text_nodes
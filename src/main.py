@@ -1,22 +1,350 @@
+import argparse
+import logging
+import os
 import sys
 
-from copystatic import init_public
-from gencontent import generate_pages_recursive
+import buildlog
+import profiling
+from buildlog import log
+from compress import compress_outputs
+from copystatic import fingerprint_assets, init_public, sync_public
+from fragmentcache import EVICTION_POLICIES, FragmentCache
+from gencontent import BuildError, build_context, generate_pages_recursive
+from images import ImagePipeline
+from manifest import GENERATOR_VERSION, BuildManifest
+from profiling import Profiler
+from server import serve
+from watch import SiteWatcher
 
 
 dir_path_static = "./static"
 dir_path_public = "./docs"
 dir_path_content = "./content"
+dir_path_cache = "./.cache"
 template_path = "./template.html"
 
 
 def main():
-    basepath = sys.argv[1] or "/"
+    parser = argparse.ArgumentParser(description="Build the static site.")
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only re-render pages whose inputs changed since the last build",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes used to render pages (0 = one per core)",
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="update static assets in place instead of wiping the output directory "
+        "(implied by --incremental)",
+    )
+    parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="with --sync, compare file contents when size matches but mtime differs",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="also copy static assets under content-hashed names and link pages "
+        "to those",
+    )
+    parser.add_argument(
+        "--images",
+        action="store_true",
+        help="add width/height to images and, with Pillow installed, srcset "
+        "variants resized to --image-widths",
+    )
+    parser.add_argument(
+        "--image-widths",
+        type=lambda value: [int(width) for width in value.split(",")],
+        default=[480, 960],
+        help="comma-separated widths of resized image variants",
+    )
+    parser.add_argument(
+        "--image-quality",
+        type=int,
+        default=80,
+        help="JPEG quality of resized image variants",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="write .gz (and .br, with brotli installed) next to changed text "
+        "outputs",
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="strip insignificant whitespace from the template and page text",
+    )
+    parser.add_argument(
+        "--site-url",
+        help="absolute URL of the published site root, used by sitemap.xml and "
+        "feed.xml (defaults to the basepath when that is absolute)",
+    )
+    parser.add_argument(
+        "--site-author",
+        help="author named in feed.xml (defaults to the home page's author: "
+        "front matter, then the site title)",
+    )
+    parser.add_argument(
+        "--drafts",
+        action="store_true",
+        help="also build pages whose front matter sets draft: true",
+    )
+    parser.add_argument(
+        "--fragment-cache",
+        action="store_true",
+        help="reuse rendered HTML for blocks whose markdown is unchanged",
+    )
+    parser.add_argument(
+        "--fragment-cache-size",
+        type=int,
+        default=4096,
+        help="number of fragments kept in memory per process",
+    )
+    parser.add_argument(
+        "--fragment-cache-disk-size",
+        type=int,
+        default=100000,
+        help="number of fragments kept on disk (0 = memory only)",
+    )
+    parser.add_argument(
+        "--fragment-cache-policy",
+        choices=EVICTION_POLICIES,
+        default="lru",
+        help="which fragments are evicted first when a limit is reached",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="after building, keep running and re-render pages as files change",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=0.1,
+        help="seconds between polls of the watched trees",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="serve pages rendered on demand from content/ instead of building",
+    )
+    parser.add_argument("--host", default="localhost", help="address to serve on")
+    parser.add_argument("--port", type=int, default=8888, help="port to serve on")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time every build stage per page and write a report and trace",
+    )
+    parser.add_argument(
+        "--profile-sort",
+        choices=("time", "peak"),
+        default="time",
+        help="order of the profile report",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="log every generated page",
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="only log warnings and errors"
+    )
+    parser.add_argument(
+        "--log-file", help="also write every log record to this file as JSON lines"
+    )
+    args = parser.parse_args()
+    basepath = args.basepath or "/"
 
-    init_public(dir_path_static, dir_path_public)
+    level = logging.INFO
+    if args.verbose:
+        level = logging.DEBUG
+    elif args.quiet:
+        level = logging.WARNING
+    buildlog.configure(level, args.log_file)
 
-    print("Generating pages...")
-    generate_pages_recursive(dir_path_content, template_path, dir_path_public, basepath)
+    if args.serve:
+        serve(
+            dir_path_content,
+            dir_path_static,
+            template_path,
+            args.host,
+            args.port,
+            # Static files are served as they are, so neither fingerprinted
+            # names nor image variants exist here.
+            context=build_context("/", minify=args.minify),
+        )
+        return
 
+    profiler = None
+    if args.profile:
+        profiler = Profiler()
+        profiler.start()
+        if args.jobs != 1:
+            log.warning("Profiling renders all pages in this process; ignoring --jobs")
+            args.jobs = 1
 
-main()
+    # Full builds record the manifest too, so a later incremental build
+    # starts from what is actually on disk.
+    manifest = BuildManifest(os.path.join(dir_path_cache, "manifest.json"))
+
+    assets = None
+    images = None
+    with profiling.stage("static copy"):
+        if args.sync or args.incremental:
+            copied, deleted = sync_public(
+                dir_path_static,
+                dir_path_public,
+                os.path.join(dir_path_cache, "static.json"),
+                checksum=args.checksum,
+            )
+            log.info(
+                "Synced static files: %d copied, %d deleted",
+                copied,
+                deleted,
+                extra=buildlog.fields(copied=copied, deleted=deleted),
+            )
+        else:
+            init_public(dir_path_static, dir_path_public)
+        if args.fingerprint:
+            # Hashes come from the manifest's cache, so unchanged assets
+            # are never read again.
+            assets = fingerprint_assets(
+                dir_path_static,
+                dir_path_public,
+                manifest,
+                os.path.join(dir_path_cache, "assets.json"),
+            )
+            log.info(
+                "Fingerprinted %d static file(s)",
+                len(assets),
+                extra=buildlog.fields(assets=len(assets)),
+            )
+
+    if args.images:
+        images = ImagePipeline(
+            os.path.join(dir_path_cache, "images"),
+            args.image_widths,
+            args.image_quality,
+            manifest,
+        )
+        if not images.can_resize:
+            log.warning("Pillow is not installed; images get sizes but no variants")
+        with profiling.stage("images"):
+            images.process(
+                dir_path_static,
+                dir_path_public,
+                os.path.join(dir_path_cache, "images.json"),
+            )
+        log.info(
+            "Processed %d image(s): %d variant(s) produced, %d reused from cache",
+            len(images.images),
+            images.produced,
+            images.reused,
+            extra=buildlog.fields(
+                images=len(images.images),
+                produced=images.produced,
+                reused=images.reused,
+            ),
+        )
+
+    cache = None
+    if args.fragment_cache:
+        cache = FragmentCache(
+            os.path.join(dir_path_cache, "fragments")
+            if args.fragment_cache_disk_size > 0
+            else None,
+            max_entries=args.fragment_cache_size,
+            max_disk_entries=args.fragment_cache_disk_size,
+            policy=args.fragment_cache_policy,
+            namespace=GENERATOR_VERSION,
+        )
+
+    log.info("Generating pages...")
+    failure = None
+    try:
+        generate_pages_recursive(
+            dir_path_content,
+            template_path,
+            dir_path_public,
+            basepath,
+            manifest,
+            incremental=args.incremental,
+            jobs=args.jobs,
+            cache=cache,
+            dir_path_static=dir_path_static,
+            assets=assets,
+            images=images,
+            minify=args.minify,
+            drafts=args.drafts,
+            site_url=args.site_url,
+            site_author=args.site_author,
+        )
+    except BuildError as e:
+        failure = e
+
+    if args.compress:
+        with profiling.stage("compress"):
+            compressed, unchanged = compress_outputs(
+                dir_path_public,
+                os.path.join(dir_path_cache, "compress.json"),
+            )
+        log.info(
+            "Compressed %d output(s), %d unchanged",
+            compressed,
+            unchanged,
+            extra=buildlog.fields(compressed=compressed, unchanged=unchanged),
+        )
+
+    if profiler is not None:
+        profiler.stop()
+        log.info(profiler.report(args.profile_sort))
+        os.makedirs(dir_path_cache, exist_ok=True)
+        profiler.save(os.path.join(dir_path_cache, "profile.json"))
+        profiler.save_trace(os.path.join(dir_path_cache, "profile.trace.json"))
+        log.info(
+            "Profile written to %s/profile.json and profile.trace.json", dir_path_cache
+        )
+
+    if failure is not None:
+        if not args.watch:
+            sys.exit(str(failure))
+        log.error(str(failure))
+
+    if args.watch:
+        assets_state = None
+        if args.fingerprint:
+            assets_state = os.path.join(dir_path_cache, "assets.json")
+        watcher = SiteWatcher(
+            dir_path_content,
+            dir_path_static,
+            template_path,
+            dir_path_public,
+            basepath,
+            cache,
+            manifest,
+            drafts=args.drafts,
+            context=build_context(basepath, assets, images, args.minify),
+            assets_state=assets_state,
+            images=images,
+            images_state=os.path.join(dir_path_cache, "images.json"),
+        )
+        try:
+            watcher.run(args.watch_interval)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+
+from frontmatter import scan_front_matter
+
+# Bump whenever a change to the generator alters the HTML it produces, so
+# incremental builds re-render every page instead of trusting old outputs.
+GENERATOR_VERSION = "6"
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    def __init__(self, path: str):
+        self.path = path
+        self.files = {}
+        self.headers = {}
+        self.pages = {}
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("generator") != GENERATOR_VERSION:
+            return
+        self.files = data.get("files", {})
+        self.headers = data.get("headers", {})
+        self.pages = data.get("pages", {})
+
+    def save(self):
+        dir = os.path.dirname(self.path)
+        if dir:
+            os.makedirs(dir, exist_ok=True)
+        data = {
+            "generator": GENERATOR_VERSION,
+            "files": self.files,
+            "headers": self.headers,
+            "pages": self.pages,
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def digest(self, path: str) -> str:
+        # Files whose size and mtime are unchanged are not read again.
+        st = os.stat(path)
+        cached = self.files.get(path)
+        if (
+            cached
+            and cached["size"] == st.st_size
+            and cached["mtime_ns"] == st.st_mtime_ns
+        ):
+            return cached["sha256"]
+        sha256 = file_digest(path)
+        self.files[path] = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha256": sha256,
+        }
+        return sha256
+
+    def front_matter(self, path: str) -> dict:
+        # Like digest(), keyed on size and mtime, so an unchanged page's
+        # header is not even read again.
+        st = os.stat(path)
+        cached = self.headers.get(path)
+        if (
+            cached
+            and cached["size"] == st.st_size
+            and cached["mtime_ns"] == st.st_mtime_ns
+        ):
+            return cached["front_matter"]
+        front_matter = scan_front_matter(path)
+        self.headers[path] = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "front_matter": front_matter,
+        }
+        return front_matter
+
+    def current_digest(self, path: str) -> str | None:
+        try:
+            return self.digest(path)
+        except FileNotFoundError:
+            return None
+
+    def page_inputs(self, from_path: str, template_path: str, basepath: str) -> dict:
+        return {
+            "source": from_path,
+            "source_sha256": self.digest(from_path),
+            "template": template_path,
+            "template_sha256": self.digest(template_path),
+            "basepath": basepath,
+        }
+
+    def is_fresh(self, dest_path: str, inputs: dict) -> bool:
+        entry = self.pages.get(dest_path)
+        if (
+            entry is None
+            or "files" not in entry
+            or "meta" not in entry
+            or not os.path.isfile(dest_path)
+        ):
+            return False
+        if any(entry.get(key) != value for key, value in inputs.items()):
+            return False
+        # The rest of the page's dependency edges, as recorded when it was
+        # last rendered: file contents, and pages that must (not) exist.
+        for path, sha256 in entry["files"].items():
+            if self.current_digest(path) != sha256:
+                return False
+        for path, exists in entry["pages"].items():
+            if os.path.isfile(path) != exists:
+                return False
+        return True
+
+    def record(
+        self,
+        dest_path: str,
+        inputs: dict,
+        deps: dict | None = None,
+        meta: dict | None = None,
+    ):
+        deps = deps or {}
+        files = deps.get("files", ())
+        pages = deps.get("pages", ())
+        self.pages[dest_path] = {
+            **inputs,
+            "files": {path: self.current_digest(path) for path in files},
+            "pages": {path: os.path.isfile(path) for path in pages},
+            # What the sitemap, feed and search index need from the page.
+            "meta": meta,
+        }
+
+    def prune(self, dest_paths) -> list[str]:
+        # Returns the outputs that no longer have a page behind them.
+        live = set(dest_paths)
+        removed = [dest_path for dest_path in self.pages if dest_path not in live]
+        for dest_path in removed:
+            del self.pages[dest_path]
+        for path in list(self.files):
+            if not os.path.exists(path):
+                del self.files[path]
+        for path in list(self.headers):
+            if not os.path.exists(path):
+                del self.headers[path]
+        return removed
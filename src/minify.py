@@ -0,0 +1,38 @@
+import re
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+COMMENT_PATTERN = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+# Elements whose text must reach the browser exactly as written.
+PRESERVED_PATTERN = re.compile(
+    r"(<(pre|textarea|script|style)\b.*?</\2\s*>)", re.DOTALL | re.IGNORECASE
+)
+# Whitespace next to these tags never renders, so it can go entirely.
+BLOCK_TAGS = (
+    "!doctype|html|head|body|meta|link|title|base|article|section|nav|main|"
+    "header|footer|aside|div|p|ul|ol|li|h[1-6]|blockquote|pre|table|thead|"
+    "tbody|tr|td|th|figure|figcaption|hr|br|script|style|noscript"
+)
+BLOCK_SPACE_PATTERN = re.compile(
+    rf"\s*(</?(?:{BLOCK_TAGS})\b[^>]*>)\s*", re.IGNORECASE
+)
+
+
+def collapse_whitespace(text: str) -> str:
+    return WHITESPACE_PATTERN.sub(" ", text)
+
+
+def minify_html(source: str) -> str:
+    parts = PRESERVED_PATTERN.split(source)
+    out = []
+    # split() yields text, then the preserved element and its tag name.
+    for i in range(0, len(parts), 3):
+        text = collapse_whitespace(COMMENT_PATTERN.sub("", parts[i]))
+        # Preserved elements are all block-level too.
+        if i > 0:
+            text = text.lstrip()
+        if i + 1 < len(parts):
+            text = text.rstrip()
+        out.append(BLOCK_SPACE_PATTERN.sub(r"\1", text))
+        if i + 1 < len(parts):
+            out.append(parts[i + 1])
+    return "".join(out).strip()
@@ -0,0 +1,156 @@
+import contextlib
+import json
+import os
+import time
+import tracemalloc
+
+NULL_STAGE = contextlib.nullcontext()
+
+# The profiler for the running build, if any. Instrumented code calls the
+# module-level stage() and page() helpers, which cost next to nothing when
+# profiling is off.
+active = None
+
+
+def stage(name: str):
+    if active is None:
+        return NULL_STAGE
+    return active.stage(name)
+
+
+def page(path: str):
+    if active is None:
+        return NULL_STAGE
+    return active.page(path)
+
+
+class Profiler:
+    def __init__(self, track_allocations: bool = True):
+        self.track_allocations = track_allocations
+        self.origin = time.perf_counter()
+        self.stack = []
+        self.current_page = None
+        self.stages = {}
+        self.pages = {}
+        self.events = []
+
+    def start(self):
+        global active
+        active = self
+        if self.track_allocations:
+            tracemalloc.start()
+
+    def stop(self):
+        global active
+        active = None
+        if self.track_allocations:
+            tracemalloc.stop()
+
+    def memory(self) -> tuple[int, int]:
+        # Traced memory now and its peak since the last call, which starts
+        # the next peak from here.
+        if not self.track_allocations:
+            return 0, 0
+        memory, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        return memory, peak
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        # Stages record self time, and the most memory they allocated on top
+        # of what was live when they started or resumed: a nested stage
+        # pauses its parent.
+        now, (memory, peak) = time.perf_counter(), self.memory()
+        if self.stack:
+            parent = self.stack[-1]
+            parent["seconds"] += now - parent["resumed"]
+            parent["peak"] = max(parent["peak"], peak - parent["memory"])
+        frame = {
+            "seconds": 0.0,
+            "peak": 0,
+            "resumed": now,
+            "memory": memory,
+            "start": now,
+        }
+        self.stack.append(frame)
+        try:
+            yield
+        finally:
+            now, (memory, peak) = time.perf_counter(), self.memory()
+            frame["seconds"] += now - frame["resumed"]
+            frame["peak"] = max(frame["peak"], peak - frame["memory"])
+            self.stack.pop()
+            self.record(name, frame, now)
+            if self.stack:
+                self.stack[-1]["resumed"] = now
+                self.stack[-1]["memory"] = memory
+
+    @contextlib.contextmanager
+    def page(self, path: str):
+        previous, self.current_page = self.current_page, path
+        self.pages.setdefault(path, {"seconds": 0.0, "peak": 0, "stages": {}})
+        try:
+            with self.stage("page"):
+                yield
+        finally:
+            self.current_page = previous
+
+    def record(self, name: str, frame: dict, end: float):
+        total = self.stages.setdefault(
+            name, {"seconds": 0.0, "peak": 0, "calls": 0}
+        )
+        total["seconds"] += frame["seconds"]
+        total["peak"] = max(total["peak"], frame["peak"])
+        total["calls"] += 1
+        if self.current_page is not None:
+            page = self.pages[self.current_page]
+            page["seconds"] += frame["seconds"]
+            page["peak"] = max(page["peak"], frame["peak"])
+            page["stages"][name] = page["stages"].get(name, 0.0) + frame["seconds"]
+        self.events.append((name, self.current_page, frame["start"], end))
+
+    def report(self, sort: str = "time", limit: int = 10) -> str:
+        field = "peak" if sort == "peak" else "seconds"
+
+        def key(item):
+            return item[1][field]
+
+        total = sum(stats["seconds"] for stats in self.stages.values()) or 1
+        lines = [f"{'stage':<14}{'time':>10}{'share':>8}{'calls':>10}{'peak':>12}"]
+        for name, stats in sorted(self.stages.items(), key=key, reverse=True):
+            lines.append(
+                f"{name:<14}{stats['seconds'] * 1000:>8.1f}ms"
+                f"{stats['seconds'] / total:>8.0%}{stats['calls']:>10}"
+                f"{stats['peak'] / 1024:>10.0f}KiB"
+            )
+        lines.append("")
+        lines.append(f"{'slowest pages':<50}{'time':>10}{'peak':>12}  top stage")
+        for path, stats in sorted(self.pages.items(), key=key, reverse=True)[:limit]:
+            top = max(stats["stages"].items(), key=lambda item: item[1])[0]
+            lines.append(
+                f"{path:<50}{stats['seconds'] * 1000:>8.1f}ms"
+                f"{stats['peak'] / 1024:>10.0f}KiB  {top}"
+            )
+        return "\n".join(lines)
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump({"stages": self.stages, "pages": self.pages}, f, indent=1)
+
+    def save_trace(self, path: str):
+        # Chrome trace event format, viewable in chrome://tracing or Perfetto.
+        events = [
+            {
+                "name": name,
+                "cat": "build",
+                "ph": "X",
+                "ts": (start - self.origin) * 1e6,
+                "dur": (end - start) * 1e6,
+                "pid": os.getpid(),
+                "tid": 0,
+                "args": {"page": page} if page else {},
+            }
+            for name, page, start, end in self.events
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
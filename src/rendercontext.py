@@ -0,0 +1,64 @@
+import hashlib
+import json
+
+
+def short_digest(value) -> str:
+    if not value:
+        return ""
+    text = json.dumps(value, sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+class RenderContext:
+    def __init__(
+        self,
+        basepath: str = "/",
+        inline_nodes: bool = True,
+        assets=None,
+        images=None,
+        minify: bool = False,
+    ):
+        self.basepath = basepath.rstrip("/")
+        # When False, inline markup is emitted straight to HTML instead of
+        # building a LeafNode per text run.
+        self.inline_nodes = inline_nodes
+        # Collapse insignificant whitespace in the template and in text.
+        self.minify = minify
+        # Maps asset URLs to their fingerprinted names, e.g.
+        # "/index.css" -> "/index.3f2a9c1d.css".
+        self.assets = assets or {}
+        # Dimensions and resized variants of static images, by URL.
+        self.images = images or {}
+        self.assets_digest = short_digest(self.assets)
+        self.images_digest = short_digest(self.images)
+        self.image_attributes = {
+            url: self.build_image_attributes(url, info)
+            for url, info in self.images.items()
+        }
+
+    @property
+    def fingerprint(self) -> str:
+        # Everything here changes rendered HTML, so it is part of the
+        # fragment cache key.
+        return (
+            f"basepath={self.basepath},assets={self.assets_digest},"
+            f"images={self.images_digest},minify={self.minify}"
+        )
+
+    def resolve_url(self, url: str) -> str:
+        if url.startswith("/") and not url.startswith("//"):
+            return self.basepath + self.assets.get(url, url)
+        return url
+
+    def build_image_attributes(self, url: str, info: dict) -> dict:
+        width = info["width"]
+        attributes = {"width": str(width), "height": str(info["height"])}
+        if info["srcset"]:
+            candidates = [
+                f"{self.resolve_url(variant)} {variant_width}w"
+                for variant, variant_width in info["srcset"]
+            ]
+            candidates.append(f"{self.resolve_url(url)} {width}w")
+            attributes["srcset"] = ", ".join(candidates)
+            attributes["sizes"] = f"(max-width: {width}px) 100vw, {width}px"
+        return attributes
@@ -0,0 +1,179 @@
+import hashlib
+import mimetypes
+import os
+import shutil
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+from buildlog import log
+from dependencies import resolve_source, safe_join
+from fragmentcache import FragmentCache
+from gencontent import render_page
+from rendercontext import RenderContext
+from template import Template
+
+
+class PageRenderer:
+    def __init__(
+        self,
+        dir_path_content,
+        template_path,
+        basepath="/",
+        cache=None,
+        context=None,
+    ):
+        self.dir_path_content = dir_path_content
+        self.template_path = template_path
+        if context is None:
+            context = RenderContext(basepath, inline_nodes=False)
+        self.context = context
+        self.cache = cache if cache is not None else FragmentCache()
+        self.lock = threading.Lock()
+        self.template = None
+        self.template_stat = None
+        self.pages = {}
+
+    def resolve(self, url_path: str) -> str | None:
+        return resolve_source(self.dir_path_content, url_path)
+
+    def current_template(self) -> Template:
+        st = os.stat(self.template_path)
+        stat = (st.st_mtime_ns, st.st_size)
+        if stat != self.template_stat:
+            self.template = Template.load(self.template_path, self.context)
+            self.template_stat = stat
+            self.pages.clear()
+        return self.template
+
+    def get(self, from_path: str) -> tuple[bytes, str, float]:
+        # Only the lookups are locked; pages render concurrently.
+        with self.lock:
+            template = self.current_template()
+            template_mtime = self.template_stat[0] / 1e9
+            st = os.stat(from_path)
+            stat = (st.st_mtime_ns, st.st_size)
+            cached = self.pages.get(from_path)
+            if cached is not None and cached[0] == stat:
+                return cached[1]
+        html = render_page(
+            from_path, template, self.context, self.cache, self.dir_path_content
+        )
+        body = html.encode()
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        resource = (body, etag, max(st.st_mtime, template_mtime))
+        with self.lock:
+            # A template reload while rendering makes this page stale already.
+            if self.template is template:
+                self.pages[from_path] = (stat, resource)
+        return resource
+
+
+class DevServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, renderer: PageRenderer, dir_path_static: str):
+        super().__init__(address, DevRequestHandler)
+        self.renderer = renderer
+        self.dir_path_static = dir_path_static
+
+
+class DevRequestHandler(BaseHTTPRequestHandler):
+    server_version = "bootdevstaticsite"
+
+    def do_GET(self):
+        self.respond(include_body=True)
+
+    def do_HEAD(self):
+        self.respond(include_body=False)
+
+    def respond(self, include_body: bool):
+        url_path = unquote(urlsplit(self.path).path)
+        static_path = safe_join(self.server.dir_path_static, url_path)
+        if os.path.isfile(static_path):
+            st = os.stat(static_path)
+            etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+            content_type = mimetypes.guess_type(static_path)[0]
+            self.send_resource(
+                etag,
+                st.st_mtime,
+                content_type or "application/octet-stream",
+                st.st_size,
+                static_path if include_body else None,
+            )
+            return
+
+        from_path = self.server.renderer.resolve(url_path)
+        if from_path is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        try:
+            body, etag, mtime = self.server.renderer.get(from_path)
+        except Exception as e:
+            self.send_error(
+                HTTPStatus.INTERNAL_SERVER_ERROR, f"{type(e).__name__}: {e}"
+            )
+            return
+        self.send_resource(
+            etag,
+            mtime,
+            "text/html; charset=utf-8",
+            len(body),
+            body if include_body else None,
+        )
+
+    def not_modified(self, etag: str, mtime: float) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or etag in tags
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(mtime) <= since
+        return False
+
+    def send_resource(self, etag, mtime, content_type, length, body):
+        if self.not_modified(etag, mtime):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(length))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", formatdate(mtime, usegmt=True))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if isinstance(body, bytes):
+            self.wfile.write(body)
+        elif body is not None:
+            with open(body, "rb") as f:
+                shutil.copyfileobj(f, self.wfile)
+
+
+def serve(
+    dir_path_content,
+    dir_path_static,
+    template_path,
+    host="localhost",
+    port=8888,
+    basepath="/",
+    cache=None,
+    context=None,
+):
+    renderer = PageRenderer(dir_path_content, template_path, basepath, cache, context)
+    with DevServer((host, port), renderer, dir_path_static) as server:
+        log.info(
+            "Serving %s on http://%s:%d/", dir_path_content, host, server.server_port
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
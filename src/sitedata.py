@@ -0,0 +1,180 @@
+import json
+import os
+import re
+import time
+from urllib.parse import urlsplit
+from xml.sax.saxutils import escape
+
+import profiling
+from buildlog import log
+from frontmatter import page_date
+from writer import write_if_changed
+
+URL_PATTERN = re.compile(r"\]\([^()]*\)")
+WORD_PATTERN = re.compile(r"[^\W_]{2,}")
+STOP_WORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or "
+    "that the this to was were will with".split()
+)
+
+
+def page_url(dest_path: str, dest_dir_path: str) -> str:
+    rel_path = os.path.relpath(dest_path, dest_dir_path).replace(os.sep, "/")
+    if rel_path == "index.html":
+        return "/"
+    if rel_path.endswith("/index.html"):
+        return "/" + rel_path[: -len("index.html")]
+    return "/" + rel_path
+
+
+def iso_time(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(timestamp))
+
+
+class PageMeta:
+    def __init__(self, from_path: str):
+        self.from_path = from_path
+        self.title = None
+        self.description = ""
+        self.date = None
+        self.author = None
+        self.terms = set()
+
+    def scan(self, block: str):
+        if block.startswith("```"):
+            return
+        text = URL_PATTERN.sub("]", block).lower()
+        self.terms.update(WORD_PATTERN.findall(text))
+
+    def track(self, blocks):
+        for block in blocks:
+            with profiling.stage("index"):
+                self.scan(block)
+            yield block
+
+    def read(self, reader, front_matter=None):
+        # Called once the page has rendered, so the reader has seen it all.
+        front_matter = front_matter or {}
+        self.title = str(front_matter.get("title", reader.title))
+        self.description = str(
+            front_matter.get("description") or reader.read_description()
+        )
+        self.date = page_date(self.from_path, front_matter)
+        if "author" in front_matter:
+            self.author = str(front_matter["author"])
+
+    def to_dict(self) -> dict:
+        return {
+            "title": self.title,
+            "description": self.description,
+            "date": self.date,
+            "author": self.author,
+            "mtime": os.path.getmtime(self.from_path),
+            "terms": sorted(self.terms - STOP_WORDS),
+        }
+
+
+def site_root(context, site_url: str | None = None) -> str | None:
+    # Sitemaps and Atom need absolute URLs: an explicit site URL, or a
+    # basepath that already is one.
+    if site_url:
+        return site_url.rstrip("/")
+    if urlsplit(context.basepath).scheme:
+        return context.basepath
+    return None
+
+
+def write_site_files(
+    pages: dict,
+    context,
+    dest_dir_path: str,
+    site_url: str | None = None,
+    feed_section="blog",
+    site_author: str | None = None,
+):
+    # pages maps each page's URL path to the metadata its render collected.
+    files = {"search.json": search_index(pages)}
+    root = site_root(context, site_url)
+    if root is not None:
+        entries = [url for url in pages if url.startswith(f"/{feed_section}/")]
+        files["sitemap.xml"] = sitemap(pages, root)
+        files["feed.xml"] = atom_feed(pages, entries, root, site_author)
+    else:
+        log.warning(
+            "No absolute site URL; skipping sitemap.xml and feed.xml "
+            "(pass --site-url or an absolute basepath)"
+        )
+        # Don't leave ones from an earlier build pointing at old pages.
+        for name in ("sitemap.xml", "feed.xml"):
+            path = os.path.join(dest_dir_path, name)
+            if os.path.exists(path):
+                os.remove(path)
+    for name, text in files.items():
+        write_if_changed(os.path.join(dest_dir_path, name), text.encode())
+
+
+def sitemap(pages: dict, root: str) -> str:
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">',
+    ]
+    for url in sorted(pages):
+        lines.append(
+            f"<url><loc>{escape(root + url)}</loc>"
+            f"<lastmod>{iso_time(pages[url]['mtime'])}</lastmod></url>"
+        )
+    lines.append("</urlset>")
+    return "\n".join(lines) + "\n"
+
+
+def atom_feed(
+    pages: dict,
+    urls: list[str],
+    root: str,
+    author: str | None = None,
+    limit: int = 20,
+) -> str:
+    urls = sorted(urls, key=lambda url: pages[url]["date"], reverse=True)[:limit]
+    home = pages.get("/")
+    title = home["title"] if home else "Feed"
+    # Atom requires an author; without one given or on the home page, the
+    # site itself is credited.
+    author = author or (home or {}).get("author") or title
+    # A feed with no entries yet was last updated with the rest of the site.
+    updated = max((pages[url]["mtime"] for url in urls or pages), default=0)
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<feed xmlns="http://www.w3.org/2005/Atom">',
+        f"<title>{escape(title)}</title>",
+        f"<id>{escape(root + '/')}</id>",
+        f'<link href="{escape(root + "/")}"/>',
+        f'<link rel="self" href="{escape(root + "/feed.xml")}"/>',
+        f"<updated>{iso_time(updated)}</updated>",
+        f"<author><name>{escape(author)}</name></author>",
+    ]
+    for url in urls:
+        page = pages[url]
+        link = escape(root + url)
+        lines.append(
+            f"<entry><title>{escape(page['title'])}</title>"
+            f'<link href="{link}"/><id>{link}</id>'
+            f"<published>{iso_time(page['date'])}</published>"
+            f"<updated>{iso_time(page['mtime'])}</updated>"
+            f"<summary>{escape(page['description'])}</summary></entry>"
+        )
+    lines.append("</feed>")
+    return "\n".join(lines) + "\n"
+
+
+def search_index(pages: dict) -> str:
+    # Prebuilt inverted index: the client looks terms up, it never indexes.
+    urls = sorted(pages)
+    terms = {}
+    for page_id, url in enumerate(urls):
+        for term in pages[url]["terms"]:
+            terms.setdefault(term, []).append(page_id)
+    index = {
+        "pages": [[url, pages[url]["title"]] for url in urls],
+        "terms": dict(sorted(terms.items())),
+    }
+    return json.dumps(index, separators=(",", ":"), ensure_ascii=False)
@@ -0,0 +1,60 @@
+import re
+
+from minify import minify_html
+
+SLOT_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+URL_ATTRIBUTE_PATTERN = re.compile(r'\b(href|src)="([^"]*)"')
+
+
+class Template:
+    def __init__(self, source: str, path: str | None = None, context=None):
+        self.path = path
+        # The URLs the template refers to, before any rewriting.
+        self.urls = [m[2] for m in URL_ATTRIBUTE_PATTERN.finditer(source)]
+        if context is not None and context.minify:
+            # Once per build, so pages themselves need no extra pass.
+            source = minify_html(source)
+        if context is not None:
+            source = URL_ATTRIBUTE_PATTERN.sub(
+                lambda m: f'{m[1]}="{context.resolve_url(m[2])}"', source
+            )
+        parts = SLOT_PATTERN.split(source)
+        self.chunks = parts[0::2]
+        self.slots = parts[1::2]
+        # A slot filled with a one-shot iterator can only be streamed once.
+        self.repeated = {name for name in self.slots if self.slots.count(name) > 1}
+
+    @classmethod
+    def load(cls, path: str, context=None) -> "Template":
+        with open(path, "r") as f:
+            return cls(f.read(), path, context)
+
+    def uses(self, name: str) -> bool:
+        return name in self.slots
+
+    def iter_render(self, values: dict):
+        for name in self.repeated:
+            value = values.get(name)
+            if callable(value):
+                value = value()
+            if value is not None and not isinstance(value, str):
+                values = {**values, name: "".join(value)}
+        for chunk, name in zip(self.chunks, self.slots):
+            yield chunk
+            value = values.get(name, "")
+            # Callables are resolved only when their slot is reached.
+            if callable(value):
+                value = value()
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value
+        yield self.chunks[-1]
+
+    def render(self, values: dict) -> str:
+        return "".join(self.iter_render(values))
+
+    def write(self, stream, values: dict):
+        write = stream.write
+        for fragment in self.iter_render(values):
+            write(fragment)
@@ -6,7 +6,10 @@ from block_markdown import (
     BlockType,
     markdown_to_html_node,
     extract_title,
+    BlockReader,
+    classify_block,
 )
+from rendercontext import RenderContext
 
 
 class TestBlockMarkdown(unittest.TestCase):
@@ -53,6 +56,50 @@ This is the same paragraph on a new line
             ],
         )
 
+    def test_markdown_to_blocks_fenced_code(self):
+        md = "# Title\n\n```\nfirst\n\n\nsecond\n```\n\nafter"
+        blocks = markdown_to_blocks(md)
+        self.assertEqual(
+            blocks, ["# Title", "```\nfirst\n\n\nsecond\n```", "after"]
+        )
+        self.assertEqual(
+            markdown_to_html_node(md).to_html(),
+            "<div><h1>Title</h1><pre><code>first\n\n\nsecond\n</code></pre>"
+            "<p>after</p></div>",
+        )
+
+    def test_fence_inside_a_block_does_not_open_code(self):
+        md = "text with\n```\nin it\n\n- item\n  ```\n\nafter"
+        self.assertEqual(
+            markdown_to_blocks(md), ["text with\n```\nin it", "- item\n  ```", "after"]
+        )
+
+    def test_block_reader_is_lazy(self):
+        consumed = []
+
+        def lines():
+            for line in ["intro", "", "# Title", "", "body", "", "tail"]:
+                consumed.append(line)
+                yield line + "\n"
+
+        reader = BlockReader(lines())
+        self.assertEqual(reader.read_title(), "Title")
+        self.assertEqual(len(consumed), 4)
+        self.assertEqual(reader.first_paragraph, "intro")
+        self.assertEqual(list(reader), ["intro", "# Title", "body", "tail"])
+
+    def test_description_skips_link_only_paragraphs(self):
+        reader = BlockReader(
+            ["[< Back Home](/)", "", "# Title", "", "![a](/a.png)", "", "See [x](/x)."]
+        )
+        self.assertEqual(reader.read_description(), "See x.")
+
+    def test_block_reader_title_not_in_code(self):
+        reader = BlockReader(["```", "# not a title", "```", "", "# Title"])
+        self.assertEqual(reader.read_title(), "Title")
+        with self.assertRaises(ValueError):
+            BlockReader(["no title"]).read_title()
+
     def test_block_to_block_type(self):
         blocks = [
             "# Heading 1",
@@ -104,6 +151,17 @@ This is the same paragraph on a new line
         block = "1. first\n3. skipped two"
         self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
 
+    def test_classify_block_returns_lines(self):
+        self.assertEqual(
+            classify_block("- a\n- b"), (BlockType.UNORDERED_LIST, ["- a", "- b"])
+        )
+        self.assertEqual(classify_block("## h"), (BlockType.HEADING, None))
+        self.assertEqual(classify_block("```\n```"), (BlockType.CODE, None))
+        self.assertEqual(classify_block("#tag"), (BlockType.PARAGRAPH, ["#tag"]))
+        self.assertEqual(
+            classify_block("1. a\n3. c"), (BlockType.PARAGRAPH, ["1. a", "3. c"])
+        )
+
     def test_paragraphs(self):
         md = """
 This is **bolded** paragraph
@@ -222,6 +280,26 @@ _italic_ and `code` text in it.
             "<div><p>This is just a paragraph.</p><p>This is another paragraph but with some <b>bold</b> and <i>italic</i> and <code>code</code> text in it.</p></div>",
         )
 
+    def test_direct_inline_emission(self):
+        md = """
+# Heading with [link](/a)
+
+Paragraph with **bold**, _italic_, `code` and ![img](/i.png)
+
+- item [one](/one)
+- item two
+
+1. first
+2. second
+
+> quoted _text_
+"""
+        tree = markdown_to_html_node(md, context=RenderContext("/site"))
+        fast = markdown_to_html_node(
+            md, context=RenderContext("/site", inline_nodes=False)
+        )
+        self.assertEqual(tree.to_html(), fast.to_html())
+
 
 class TestExtractTitle(unittest.TestCase):
     def test_eq(self):
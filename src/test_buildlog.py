@@ -0,0 +1,89 @@
+import io
+import json
+import logging
+import os
+import tempfile
+import unittest
+
+import buildlog
+from buildlog import Progress, fields, log
+
+
+class TtyStream(io.StringIO):
+    def isatty(self):
+        return True
+
+
+class TestBuildLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.console = io.StringIO()
+
+    def tearDown(self):
+        for handler in list(log.handlers):
+            log.removeHandler(handler)
+            target = getattr(handler, "target", None)
+            handler.close()
+            if target is not None:
+                target.close()
+        buildlog.console = None
+        self.tmp.cleanup()
+
+    def test_console_level(self):
+        buildlog.configure(logging.INFO, stream=self.console)
+        log.debug("per page")
+        log.info("summary")
+        self.assertEqual(self.console.getvalue(), "summary\n")
+
+    def test_log_file_gets_every_record_as_json(self):
+        path = os.path.join(self.tmp.name, "build.jsonl")
+        buildlog.configure(logging.WARNING, path, stream=self.console)
+        log.debug("Generated %s", "a.md", extra=fields(page="a.md", ms=1.5))
+        log.info("done")
+        self.assertEqual(self.console.getvalue(), "")
+        for handler in log.handlers:
+            handler.flush()
+        with open(path) as f:
+            entries = [json.loads(line) for line in f]
+        self.assertEqual(
+            [(entry["level"], entry["message"]) for entry in entries],
+            [("debug", "Generated a.md"), ("info", "done")],
+        )
+        self.assertEqual(entries[0]["page"], "a.md")
+        self.assertEqual(entries[0]["ms"], 1.5)
+
+
+class TestProgress(unittest.TestCase):
+    def tearDown(self):
+        for handler in list(log.handlers):
+            log.removeHandler(handler)
+        buildlog.console = None
+
+    def test_silent_off_terminal(self):
+        buildlog.configure(logging.INFO, stream=io.StringIO())
+        stream = io.StringIO()
+        progress = Progress(3, stream=stream)
+        progress.advance()
+        progress.finish()
+        self.assertEqual(stream.getvalue(), "")
+
+    def test_counts_on_terminal(self):
+        buildlog.configure(logging.INFO, stream=io.StringIO())
+        stream = TtyStream()
+        progress = Progress(2, stream=stream, interval=0)
+        progress.advance()
+        progress.advance()
+        progress.finish()
+        self.assertIn("\r1/2 pages", stream.getvalue())
+        self.assertIn("\r2/2 pages", stream.getvalue())
+
+    def test_silent_when_verbose(self):
+        buildlog.configure(logging.DEBUG, stream=io.StringIO())
+        stream = TtyStream()
+        progress = Progress(2, stream=stream, interval=0)
+        progress.advance()
+        self.assertEqual(stream.getvalue(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
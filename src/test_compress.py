@@ -0,0 +1,64 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from compress import compress_outputs
+
+
+class TestCompressOutputs(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "public")
+        self.state = os.path.join(self.tmp.name, "cache", "compress.json")
+        self.page = self.write(os.path.join("blog", "index.html"), "<p>hi</p>" * 100)
+        self.write("index.css", "body { margin: 0; }\n" * 50)
+        self.write("tiny.html", "<p>hi</p>")
+        self.write(os.path.join("images", "a.png"), "png" * 200)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def compress(self):
+        return compress_outputs(self.root, self.state, jobs=2)
+
+    def test_sidecars_for_compressible_outputs(self):
+        self.assertEqual(self.compress(), (3, 0))
+        with gzip.open(self.page + ".gz", "rt") as f:
+            self.assertEqual(f.read(), "<p>hi</p>" * 100)
+        self.assertTrue(os.path.exists(os.path.join(self.root, "index.css.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.root, "tiny.html.gz")))
+        png = os.path.join(self.root, "images", "a.png")
+        self.assertFalse(os.path.exists(png + ".gz"))
+
+    def test_only_changed_outputs_recompressed(self):
+        self.compress()
+        self.assertEqual(self.compress(), (0, 3))
+        self.write(os.path.join("blog", "index.html"), "<p>yo</p>" * 100)
+        os.utime(self.page, ns=(0, 10**9))
+        self.assertEqual(self.compress(), (1, 2))
+        with gzip.open(self.page + ".gz", "rt") as f:
+            self.assertEqual(f.read(), "<p>yo</p>" * 100)
+
+    def test_missing_sidecar_is_rewritten(self):
+        self.compress()
+        os.remove(self.page + ".gz")
+        self.assertEqual(self.compress(), (1, 2))
+        self.assertTrue(os.path.exists(self.page + ".gz"))
+
+    def test_removed_output_drops_sidecars(self):
+        self.compress()
+        os.remove(self.page)
+        self.compress()
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+
+
+if __name__ == "__main__":
+    unittest.main()
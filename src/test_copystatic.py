@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+
+from copystatic import fingerprint_assets, sync_public
+from manifest import BuildManifest
+
+
+class TestSyncPublic(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "static")
+        self.dst = os.path.join(self.tmp.name, "public")
+        self.state = os.path.join(self.tmp.name, "cache", "static.json")
+        self.write(self.src, "index.css", "body {}")
+        self.write(self.src, os.path.join("images", "a.png"), "png-a")
+        self.write(self.src, os.path.join("images", "b.png"), "png-b")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, root, name, text):
+        path = os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def read(self, name):
+        with open(os.path.join(self.dst, name)) as f:
+            return f.read()
+
+    def test_copies_only_changed_files(self):
+        self.assertEqual(sync_public(self.src, self.dst, self.state), (3, 0))
+        self.assertEqual(self.read(os.path.join("images", "a.png")), "png-a")
+        css_mtime = os.stat(os.path.join(self.dst, "index.css")).st_mtime_ns
+
+        self.assertEqual(sync_public(self.src, self.dst, self.state), (0, 0))
+        self.write(self.src, os.path.join("images", "a.png"), "png-a2")
+        self.assertEqual(sync_public(self.src, self.dst, self.state), (1, 0))
+        self.assertEqual(self.read(os.path.join("images", "a.png")), "png-a2")
+        self.assertEqual(
+            os.stat(os.path.join(self.dst, "index.css")).st_mtime_ns, css_mtime
+        )
+
+    def test_deletes_only_stale_synced_files(self):
+        sync_public(self.src, self.dst, self.state)
+        page = self.write(self.dst, "index.html", "<p>page</p>")
+        os.remove(os.path.join(self.src, "images", "a.png"))
+        os.remove(os.path.join(self.src, "images", "b.png"))
+        self.assertEqual(sync_public(self.src, self.dst, self.state), (0, 2))
+        self.assertFalse(os.path.exists(os.path.join(self.dst, "images")))
+        self.assertTrue(os.path.exists(page))
+
+    def test_checksum_skips_touched_identical_files(self):
+        sync_public(self.src, self.dst, self.state)
+        os.utime(os.path.join(self.src, "index.css"), ns=(0, 0))
+        self.assertEqual(
+            sync_public(self.src, self.dst, self.state, checksum=True), (0, 0)
+        )
+        self.assertEqual(os.stat(os.path.join(self.dst, "index.css")).st_mtime_ns, 0)
+        # Now that the times match, even a plain sync skips the file.
+        self.assertEqual(sync_public(self.src, self.dst, self.state), (0, 0))
+
+
+class TestFingerprintAssets(unittest.TestCase):
+    tearDown = TestSyncPublic.tearDown
+    write = TestSyncPublic.write
+    read = TestSyncPublic.read
+
+    def setUp(self):
+        TestSyncPublic.setUp(self)
+        self.assets_state = os.path.join(self.tmp.name, "cache", "assets.json")
+        self.manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+
+    def fingerprint(self):
+        return fingerprint_assets(self.src, self.dst, self.manifest, self.assets_state)
+
+    def test_content_hashed_copies(self):
+        sync_public(self.src, self.dst, self.state)
+        assets = self.fingerprint()
+        self.assertEqual(
+            sorted(assets), ["/images/a.png", "/images/b.png", "/index.css"]
+        )
+        css = assets["/index.css"]
+        self.assertRegex(css, r"^/index\.[0-9a-f]{8}\.css$")
+        self.assertEqual(self.read(css[1:]), "body {}")
+        self.assertEqual(self.read("index.css"), "body {}")
+
+    def test_unchanged_assets_not_rehashed(self):
+        first = self.fingerprint()
+        digests = dict(self.manifest.files)
+        self.manifest.files = {
+            path: {**entry, "sha256": "f" * 64} for path, entry in digests.items()
+        }
+        # A stale cached hash is trusted while size and mtime match.
+        self.assertEqual(self.fingerprint()["/index.css"], "/index.ffffffff.css")
+        self.manifest.files = digests
+        self.assertEqual(self.fingerprint(), first)
+
+    def test_replaced_asset_removes_old_copy(self):
+        old = self.fingerprint()["/images/a.png"]
+        self.write(self.src, os.path.join("images", "a.png"), "png-a2")
+        new = self.fingerprint()["/images/a.png"]
+        self.assertNotEqual(old, new)
+        self.assertFalse(os.path.exists(os.path.join(self.dst, *old.split("/"))))
+        self.assertEqual(self.read(new[1:]), "png-a2")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+
+from dependencies import PageDependencies, local_path, resolve_source
+
+
+class TestDependencies(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.static = os.path.join(self.tmp.name, "static")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "# Post")
+        self.write(os.path.join(self.content, "contact.md"), "# Contact")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def deps_for(self, rel_path, *blocks):
+        from_path = os.path.join(self.content, rel_path)
+        deps = PageDependencies(from_path, self.content, self.static)
+        self.assertEqual(list(deps.track(blocks)), list(blocks))
+        return deps.to_dict()
+
+    def test_local_path(self):
+        self.assertEqual(local_path("/images/a.png", "/blog/"), "/images/a.png")
+        self.assertEqual(local_path("b.png?v=1#top", "/blog/"), "/blog/b.png")
+        self.assertIsNone(local_path("https://boot.dev", "/"))
+        self.assertIsNone(local_path("//cdn.example/a.png", "/"))
+        self.assertIsNone(local_path("#section", "/"))
+
+    def test_resolve_source(self):
+        self.assertEqual(
+            resolve_source(self.content, "/blog/post"),
+            os.path.join(self.content, "blog", "post", "index.md"),
+        )
+        self.assertEqual(
+            resolve_source(self.content, "/contact.html"),
+            os.path.join(self.content, "contact.md"),
+        )
+        self.assertIsNone(resolve_source(self.content, "/missing"))
+
+    def test_images_and_links(self):
+        deps = self.deps_for(
+            os.path.join("blog", "post", "index.md"),
+            "# Post with ![a](/images/a.png)",
+            "See [home](/) and [contact](/contact) and [away](https://boot.dev)",
+            "A relative ![b](b.png) and [missing](/nope)",
+        )
+        self.assertEqual(
+            deps["files"],
+            sorted(
+                [
+                    os.path.join(self.static, "images", "a.png"),
+                    os.path.join(self.static, "blog", "post", "b.png"),
+                ]
+            ),
+        )
+        self.assertEqual(
+            deps["pages"],
+            sorted(
+                [
+                    os.path.join(self.content, "index.md"),
+                    os.path.join(self.content, "contact.md"),
+                    os.path.join(self.content, "nope.md"),
+                    os.path.join(self.content, "nope", "index.md"),
+                ]
+            ),
+        )
+
+    def test_code_blocks_ignored(self):
+        deps = self.deps_for("index.md", "```\n[not a link](/contact)\n```")
+        self.assertEqual(deps, {"files": [], "pages": []})
+
+
+if __name__ == "__main__":
+    unittest.main()
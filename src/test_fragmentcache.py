@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+
+from block_markdown import markdown_to_html_node
+from fragmentcache import FragmentCache
+
+
+class TestFragmentCache(unittest.TestCase):
+    def test_memory_lru(self):
+        cache = FragmentCache(max_entries=2)
+        cache.put("a", "<p>a</p>")
+        cache.put("b", "<p>b</p>")
+        self.assertEqual(cache.get("a"), "<p>a</p>")
+        cache.put("c", "<p>c</p>")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "<p>a</p>")
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_memory_fifo(self):
+        cache = FragmentCache(max_entries=2, policy="fifo")
+        cache.put("a", "<p>a</p>")
+        cache.put("b", "<p>b</p>")
+        cache.get("a")
+        cache.put("c", "<p>c</p>")
+        self.assertIsNone(cache.get("a"))
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            FragmentCache(policy="random")
+
+    def test_namespace_changes_key(self):
+        self.assertNotEqual(
+            FragmentCache(namespace="1").key("block"),
+            FragmentCache(namespace="2").key("block"),
+        )
+
+    def test_disk_cache_and_prune(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "fragments")
+            cache = FragmentCache(path, max_disk_entries=1)
+            cache.put(cache.key("one"), "<p>one</p>")
+            cache.put(cache.key("two"), "<p>two</p>")
+
+            fresh = FragmentCache(path, max_disk_entries=1)
+            self.assertEqual(fresh.get(fresh.key("one")), "<p>one</p>")
+            self.assertEqual(fresh.prune(), 1)
+
+    def test_markdown_to_html_node_uses_cache(self):
+        md = "# Title\n\nSome **bold** text\n\n- a\n- b"
+        cache = FragmentCache()
+        expected = markdown_to_html_node(md).to_html()
+        self.assertEqual(markdown_to_html_node(md, cache).to_html(), expected)
+        self.assertEqual((cache.hits, cache.misses), (0, 3))
+        edited = md.replace("bold", "strong")
+        markdown_to_html_node(edited, cache)
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import io
+import os
+import tempfile
+import unittest
+
+from frontmatter import is_draft, page_date, read_front_matter, scan_front_matter
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_reads_header_only(self):
+        f = io.StringIO(
+            "---\n"
+            "title: 'Hello: world'\n"
+            "# a comment\n"
+            "tags: [a, \"b c\"]\n"
+            "draft: yes\n"
+            "---\n"
+            "# Body\n"
+        )
+        front_matter = read_front_matter(f)
+        self.assertEqual(
+            front_matter,
+            {"title": "Hello: world", "tags": ["a", "b c"], "draft": True},
+        )
+        self.assertTrue(is_draft(front_matter))
+        self.assertEqual(f.read(), "# Body\n")
+
+    def test_no_front_matter_rewinds(self):
+        f = io.StringIO("# Title\n\nBody")
+        self.assertEqual(read_front_matter(f), {})
+        self.assertEqual(f.read(), "# Title\n\nBody")
+        self.assertFalse(is_draft({}))
+
+    def test_errors(self):
+        with self.assertRaisesRegex(ValueError, "never closed"):
+            read_front_matter(io.StringIO("---\ntitle: x\n"))
+        with self.assertRaisesRegex(ValueError, "line 3"):
+            read_front_matter(io.StringIO("---\ntitle: x\nnot a pair\n---\n"))
+
+    def test_scan_and_date(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "page.md")
+            with open(path, "w") as f:
+                f.write("---\ndate: 1970-01-02\n---\n# Page")
+            front_matter = scan_front_matter(path)
+            self.assertEqual(page_date(path, front_matter), 86400)
+            self.assertEqual(page_date(path, {}), os.path.getmtime(path))
+            with self.assertRaisesRegex(ValueError, "invalid date"):
+                page_date(path, {"date": "soon"})
+
+
+if __name__ == "__main__":
+    unittest.main()
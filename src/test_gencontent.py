@@ -0,0 +1,314 @@
+import functools
+import json
+import multiprocessing
+import os
+import tempfile
+import unittest
+
+from copystatic import fingerprint_assets
+from gencontent import BuildError, find_pages, generate_pages_recursive, render_pages
+from manifest import BuildManifest
+from rendercontext import RenderContext
+from template import Template
+
+
+TEMPLATE = "<title>{{ Title }}</title><main>{{ Content }}</main>"
+SITE_URL = "https://example.com/site"
+
+
+class TestGeneratePages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        with open(self.template, "w") as f:
+            f.write(TEMPLATE)
+        for i in range(6):
+            self.write(os.path.join(f"post{i}", "index.md"), f"# Post {i}\n\nBody {i}")
+        self.write("index.md", "# Home\n\n[first post](/post0)")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.content, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def build(self, name, **kwargs):
+        dest = os.path.join(self.tmp.name, name)
+        kwargs.setdefault("site_url", SITE_URL)
+        generate_pages_recursive(self.content, self.template, dest, "/site", **kwargs)
+        outputs = {}
+        for from_path, dest_path in find_pages(self.content, dest):
+            with open(dest_path) as f:
+                outputs[os.path.relpath(dest_path, dest)] = f.read()
+        return outputs
+
+    def test_find_pages_sorted(self):
+        pages = find_pages(self.content, "out")
+        self.assertEqual(
+            pages[0],
+            (os.path.join(self.content, "index.md"), os.path.join("out", "index.html")),
+        )
+        self.assertEqual(pages, sorted(pages))
+
+    def test_parallel_matches_sequential(self):
+        sequential = self.build("seq")
+        parallel = self.build("par", jobs=3)
+        self.assertEqual(len(sequential), 7)
+        self.assertEqual(sequential, parallel)
+        self.assertEqual(
+            sequential["index.html"],
+            '<title>Home</title><main><div><h1>Home</h1><p><a href="/site/post0">first post</a></p></div></main>',
+        )
+
+    def test_spawned_workers(self):
+        # macOS and Windows spawn workers, which re-import modules from scratch.
+        context = RenderContext("/site", inline_nodes=False)
+        template = Template.load(self.template, context)
+        dest = os.path.join(self.tmp.name, "out")
+        pages = find_pages(self.content, dest)
+        results = render_pages(
+            pages,
+            template,
+            context,
+            jobs=2,
+            content_root=self.content,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        self.assertEqual([result[1] for result in results], [None] * len(pages))
+        with open(os.path.join(dest, "post3", "index.html")) as f:
+            self.assertIn("<p>Body 3</p>", f.read())
+
+    def test_code_block_urls_untouched(self):
+        self.write("code.md", '# Code\n\n```\n<a href="/x">x</a>\n```')
+        outputs = self.build("out")
+        self.assertIn('<code><a href="/x">x</a>\n</code>', outputs["code.html"])
+        self.assertNotIn("/site/x", outputs["code.html"])
+
+    def test_extra_slots(self):
+        with open(self.template, "w") as f:
+            f.write('{{ Nav }}<meta content="{{ Description }}">{{ Date }}')
+        self.write(os.path.join("post1", "extra.md"), "# Extra\n\nA <b>\n\nB")
+        outputs = self.build("out")
+        nav, rest = outputs[os.path.join("post1", "extra.html")].split("</nav>")
+        self.assertEqual(
+            nav,
+            '<nav><a href="/site/">Home</a> / <a href="/site/post1">post1</a>',
+        )
+        self.assertTrue(rest.startswith('<meta content="A &lt;b&gt;">20'))
+
+    def test_errors_are_aggregated(self):
+        self.write("bad1.md", "# Bad\n\nunclosed **bold")
+        self.write("bad2.md", "no title")
+        with self.assertRaises(BuildError) as context:
+            self.build("out", jobs=2)
+        failed = [os.path.basename(path) for path, _ in context.exception.failures]
+        self.assertEqual(failed, ["bad1.md", "bad2.md"])
+        # Pages that fail part way leave no partial output behind.
+        names = os.listdir(os.path.join(self.tmp.name, "out"))
+        self.assertFalse([name for name in names if name.endswith(".tmp")])
+        self.assertNotIn("bad1.html", names)
+        self.assertTrue(
+            os.path.exists(os.path.join(self.tmp.name, "out", "post5", "index.html"))
+        )
+
+    def test_rebuild_leaves_identical_outputs_alone(self):
+        self.build("out")
+        index = os.path.join(self.tmp.name, "out", "index.html")
+        post = os.path.join(self.tmp.name, "out", "post0", "index.html")
+        os.utime(index, ns=(0, 10**9))
+        os.utime(post, ns=(0, 10**9))
+        self.write(os.path.join("post0", "index.md"), "# Post 0\n\nEdited")
+        self.build("out")
+        self.assertEqual(os.stat(index).st_mtime_ns, 10**9)
+        self.assertNotEqual(os.stat(post).st_mtime_ns, 10**9)
+
+    def test_write_errors_fail_the_page(self):
+        os.makedirs(os.path.join(self.tmp.name, "out", "post1", "index.html"))
+        with self.assertRaises(BuildError) as context:
+            self.build("out")
+        failed = [path for path, _ in context.exception.failures]
+        self.assertEqual(failed, [os.path.join(self.content, "post1", "index.md")])
+
+    def test_incremental_follows_dependencies(self):
+        static = os.path.join(self.tmp.name, "static")
+        image = os.path.join(static, "a.png")
+        os.makedirs(static)
+        with open(image, "w") as f:
+            f.write("png")
+        self.write(os.path.join("post1", "index.md"), "# Post 1\n\n![a](/a.png)")
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        build = functools.partial(
+            generate_pages_recursive,
+            self.content,
+            self.template,
+            os.path.join(self.tmp.name, "out"),
+            "/",
+            manifest,
+            incremental=True,
+            dir_path_static=static,
+            site_url=SITE_URL,
+        )
+        build()
+        dest = os.path.join(self.tmp.name, "out", "post1", "index.html")
+        os.remove(dest)
+        with open(dest, "w") as f:
+            f.write("stale")
+        build()
+        with open(dest) as f:
+            self.assertEqual(f.read(), "stale")
+
+        with open(image, "w") as f:
+            f.write("new png")
+        os.utime(image, ns=(0, 10**9))
+        build()
+        with open(dest) as f:
+            self.assertIn("Post 1", f.read())
+
+    def test_removed_pages_are_unpublished(self):
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        dest = os.path.join(self.tmp.name, "out")
+        self.build("out", manifest=manifest, incremental=True)
+        page = os.path.join(dest, "post2", "index.html")
+        with open(page + ".gz", "wb") as f:
+            f.write(b"gz")
+        os.remove(os.path.join(self.content, "post2", "index.md"))
+        self.build("out", manifest=manifest, incremental=True)
+        self.assertFalse(os.path.exists(os.path.join(dest, "post2")))
+        self.assertTrue(os.path.exists(os.path.join(dest, "post1", "index.html")))
+
+    def test_incremental_follows_static_links(self):
+        static = os.path.join(self.tmp.name, "static")
+        doc = os.path.join(static, "doc.txt")
+        os.makedirs(static)
+        with open(doc, "w") as f:
+            f.write("v1")
+        self.write(os.path.join("post1", "index.md"), "# Post 1\n\n[doc](/doc.txt)")
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        dest = os.path.join(self.tmp.name, "out")
+
+        def build():
+            assets = fingerprint_assets(static, dest, manifest)
+            generate_pages_recursive(
+                self.content,
+                self.template,
+                dest,
+                "/",
+                manifest,
+                incremental=True,
+                dir_path_static=static,
+                assets=assets,
+                site_url=SITE_URL,
+            )
+            with open(os.path.join(dest, "post1", "index.html")) as f:
+                return f.read(), assets["/doc.txt"]
+
+        html, name = build()
+        self.assertIn(f'href="{name}"', html)
+        with open(doc, "w") as f:
+            f.write("v2")
+        os.utime(doc, ns=(0, 10**9))
+        html, new_name = build()
+        self.assertNotEqual(new_name, name)
+        self.assertIn(f'href="{new_name}"', html)
+
+    def test_fingerprinted_assets(self):
+        with open(self.template, "w") as f:
+            f.write('<link href="/index.css">{{ Content }}')
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        dest = os.path.join(self.tmp.name, "out")
+
+        def build(assets):
+            generate_pages_recursive(
+                self.content,
+                self.template,
+                dest,
+                "/",
+                manifest,
+                True,
+                assets=assets,
+                site_url=SITE_URL,
+            )
+            with open(os.path.join(dest, "post0", "index.html")) as f:
+                return f.read()
+
+        first = build({"/index.css": "/index.aaaa.css"})
+        self.assertIn('href="/index.aaaa.css"', first)
+        # A new stylesheet hash invalidates pages even though no source changed.
+        second = build({"/index.css": "/index.bbbb.css"})
+        self.assertIn('href="/index.bbbb.css"', second)
+        self.assertIn('href="/index.css"', build(None))
+
+    def test_site_files_cover_fresh_pages(self):
+        self.write(os.path.join("blog", "a.md"), "# A\n\nSearchable words here")
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        self.build("out", manifest=manifest, incremental=True)
+        self.write(os.path.join("post0", "index.md"), "# Post 0\n\nEdited")
+        self.build("out", manifest=manifest, incremental=True)
+        dest = os.path.join(self.tmp.name, "out")
+        with open(os.path.join(dest, "search.json")) as f:
+            index = json.load(f)
+        urls = [url for url, _ in index["pages"]]
+        self.assertEqual(len(urls), 8)
+        self.assertEqual(urls[index["terms"]["searchable"][0]], "/blog/a.html")
+        self.assertEqual(index["terms"]["edited"], [urls.index("/post0/")])
+        with open(os.path.join(dest, "feed.xml")) as f:
+            feed = f.read()
+        self.assertEqual(feed.count("<entry>"), 1)
+        self.assertIn("<summary>Searchable words here</summary>", feed)
+        with open(os.path.join(dest, "sitemap.xml")) as f:
+            self.assertEqual(f.read().count("<loc>https://example.com/site/"), 8)
+
+    def test_sitemap_and_feed_need_absolute_urls(self):
+        dest = os.path.join(self.tmp.name, "out")
+        self.build("out")
+        with self.assertLogs("site", "WARNING"):
+            self.build("out", site_url=None)
+        self.assertEqual(
+            sorted(name for name in os.listdir(dest) if "." in name),
+            ["index.html", "search.json"],
+        )
+        # An absolute basepath is enough on its own.
+        absolute = os.path.join(self.tmp.name, "abs")
+        generate_pages_recursive(self.content, self.template, absolute, SITE_URL)
+        with open(os.path.join(absolute, "feed.xml")) as f:
+            self.assertIn(f"<id>{SITE_URL}/</id>", f.read())
+
+    def test_front_matter_and_drafts(self):
+        with open(self.template, "w") as f:
+            f.write('<title>{{ Title }}</title><meta content="{{ Description }}">')
+        self.write(
+            "about.md",
+            '---\ntitle: "About us"\ndescription: Who & why\n---\n\nNo heading',
+        )
+        # A broken body would fail the build if drafts were ever parsed.
+        self.write("wip.md", "---\ndraft: true\n---\n# WIP\n\nunclosed **bold")
+        dest = os.path.join(self.tmp.name, "out")
+        generate_pages_recursive(
+            self.content, self.template, dest, "/", site_url=SITE_URL
+        )
+        with open(os.path.join(dest, "about.html")) as f:
+            self.assertEqual(
+                f.read(), '<title>About us</title><meta content="Who &amp; why">'
+            )
+        self.assertFalse(os.path.exists(os.path.join(dest, "wip.html")))
+        with open(os.path.join(dest, "search.json")) as f:
+            self.assertNotIn("wip", f.read().lower())
+        with self.assertRaises(BuildError):
+            self.build("drafts", drafts=True)
+
+    def test_new_drafts_are_unpublished(self):
+        dest = os.path.join(self.tmp.name, "out")
+        self.build("out")
+        self.write(os.path.join("post4", "index.md"), "---\ndraft: true\n---\n# P")
+        generate_pages_recursive(
+            self.content, self.template, dest, "/site", site_url=SITE_URL
+        )
+        self.assertFalse(os.path.exists(os.path.join(dest, "post4")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from htmlnode import HTMLNode, LeafNode, ParentNode
@@ -27,6 +28,12 @@ class TestHTMLNode(unittest.TestCase):
         self.assertIsNone(node.children)
         self.assertIsNone(node.props)
 
+    def test_compact_representation(self):
+        node = LeafNode("b", "bold", {})
+        self.assertIsNone(node.props)
+        self.assertFalse(hasattr(node, "__dict__"))
+        self.assertFalse(hasattr(ParentNode("p", [node]), "__dict__"))
+
     def test_repr(self):
         child = HTMLNode("span", "Child text")
         node = HTMLNode("a", "Click Here!", [child], {"href": "https://boot.dev"})
@@ -91,6 +98,29 @@ class TestHTMLNode(unittest.TestCase):
             "<div><span><b>grandchild</b></span></div>",
         )
 
+    def test_iter_html_fragments(self):
+        node = ParentNode(
+            "ul",
+            [ParentNode("li", [LeafNode("b", "one")]), LeafNode("li", "two")],
+            {"class": "my-list"},
+        )
+        fragments = list(node.iter_html())
+        self.assertEqual(fragments[0], '<ul class="my-list">')
+        self.assertEqual("".join(fragments), node.to_html())
+
+    def test_write_html(self):
+        node = ParentNode("p", [LeafNode(None, "Hello "), LeafNode("i", "world")])
+        stream = io.StringIO()
+        node.write_html(stream)
+        self.assertEqual(stream.getvalue(), "<p>Hello <i>world</i></p>")
+
+    def test_deep_tree_to_html(self):
+        node = LeafNode(None, "leaf")
+        for _ in range(200):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span>" * 200 + "leaf"))
+
     def test_parent_missing_children(self):
         node = ParentNode("div", None)
         with self.assertRaises(ValueError):
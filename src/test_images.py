@@ -0,0 +1,124 @@
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+from unittest import mock
+
+import images
+from images import ImagePipeline, image_size
+
+
+def png_bytes(width, height):
+    def chunk(kind, data):
+        crc = zlib.crc32(kind + data)
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", crc)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    pixels = zlib.compress(b"\0" * (1 + 3 * width) * height)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", pixels)
+        + chunk(b"IEND", b"")
+    )
+
+
+def jpeg_bytes(width, height):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\0" + b"\0" * 9
+    sof0 = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, height, width, 1)
+    sof0 += b"\x01\x11\0"
+    return b"\xff\xd8" + app0 + sof0 + b"\xff\xd9"
+
+
+def fake_derivative(src_path, dest_path, width, quality):
+    with open(dest_path, "w") as f:
+        f.write(f"{width}px")
+
+
+class TestImageSize(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_png(self):
+        self.assertEqual(image_size(self.write("a.png", png_bytes(30, 20))), (30, 20))
+
+    def test_gif(self):
+        data = b"GIF89a" + struct.pack("<HH", 640, 480) + b"\0" * 20
+        self.assertEqual(image_size(self.write("a.gif", data)), (640, 480))
+
+    def test_jpeg(self):
+        self.assertEqual(
+            image_size(self.write("a.jpg", jpeg_bytes(1024, 768))), (1024, 768)
+        )
+
+    def test_unknown(self):
+        self.assertIsNone(image_size(self.write("a.png", b"not an image")))
+
+
+class TestImagePipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = os.path.join(self.tmp.name, "static")
+        self.dst = os.path.join(self.tmp.name, "public")
+        self.cache = os.path.join(self.tmp.name, "cache")
+        self.state = os.path.join(self.tmp.name, "images.json")
+        os.makedirs(os.path.join(self.src, "images"))
+        os.makedirs(os.path.join(self.dst, "images"))
+        self.image = os.path.join(self.src, "images", "a.png")
+        with open(self.image, "wb") as f:
+            f.write(png_bytes(1000, 500))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sizes_without_pillow(self):
+        with mock.patch.object(images, "Image", None):
+            result = ImagePipeline(self.cache).process(self.src, self.dst)
+        self.assertEqual(
+            result, {"/images/a.png": {"width": 1000, "height": 500, "srcset": []}}
+        )
+
+    def test_settings_follow_pillow(self):
+        pipeline = ImagePipeline(self.cache)
+        with mock.patch.object(images, "Image", None):
+            without = pipeline.settings
+        with mock.patch.object(images, "Image", object()):
+            self.assertNotEqual(pipeline.settings, without)
+
+    @mock.patch.object(images, "make_derivative", side_effect=fake_derivative)
+    @mock.patch.object(images, "Image", object())
+    def test_variants_produced_once(self, make_derivative):
+        pipeline = ImagePipeline(self.cache, widths=(480, 960, 2000))
+        result = pipeline.process(self.src, self.dst, self.state)
+        srcset = result["/images/a.png"]["srcset"]
+        self.assertEqual([width for _, width in srcset], [480, 960])
+        self.assertRegex(srcset[0][0], r"^/images/a\.480w\.[0-9a-f]{8}\.png$")
+        with open(os.path.join(self.dst, *srcset[0][0].split("/"))) as f:
+            self.assertEqual(f.read(), "480px")
+        self.assertEqual(make_derivative.call_count, 2)
+
+        again = ImagePipeline(self.cache, widths=(480, 960, 2000))
+        self.assertEqual(again.process(self.src, self.dst, self.state), result)
+        self.assertEqual(make_derivative.call_count, 2)
+        self.assertEqual(again.reused, 2)
+
+        # New settings produce new variants and retire the old ones.
+        smaller = ImagePipeline(self.cache, widths=(320,))
+        smaller.process(self.src, self.dst, self.state)
+        self.assertEqual(make_derivative.call_count, 3)
+        old_variant = os.path.join(self.dst, *srcset[0][0].split("/"))
+        self.assertFalse(os.path.exists(old_variant))
+
+
+if __name__ == "__main__":
+    unittest.main()
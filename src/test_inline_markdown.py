@@ -233,6 +233,43 @@ class TestInlineMarkdown(unittest.TestCase):
         nodes = text_to_textnodes(text)
         self.assertListEqual(expected_nodes, nodes)
 
+    def test_text_to_textnodes_code_keeps_delimiters(self):
+        nodes = text_to_textnodes("Use `**kwargs` and `snake_case_names` here")
+        self.assertListEqual(
+            [
+                TextNode("Use ", TextType.TEXT),
+                TextNode("**kwargs", TextType.CODE),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("snake_case_names", TextType.CODE),
+                TextNode(" here", TextType.TEXT),
+            ],
+            nodes,
+        )
+
+    def test_text_to_textnodes_underscore_in_url(self):
+        nodes = text_to_textnodes("See [the docs](https://example.com/a_b_c) _now_")
+        self.assertListEqual(
+            [
+                TextNode("See ", TextType.TEXT),
+                TextNode("the docs", TextType.LINK, "https://example.com/a_b_c"),
+                TextNode(" ", TextType.TEXT),
+                TextNode("now", TextType.ITALIC),
+            ],
+            nodes,
+        )
+
+    def test_text_to_textnodes_unmatched(self):
+        with self.assertRaises(ValueError) as context:
+            text_to_textnodes("This is **bold text with unmatched delimiter")
+        self.assertEqual(str(context.exception), 'Unmatched delimiter "**" in text')
+
+    def test_text_to_textnodes_many_links(self):
+        text = " ".join(f"[link {i}](/page/{i})" for i in range(500))
+        nodes = text_to_textnodes(text)
+        self.assertEqual(len(nodes), 999)
+        self.assertEqual(nodes[-1], TextNode("link 499", TextType.LINK, "/page/499"))
+        self.assertEqual(nodes, split_nodes_links([TextNode(text, TextType.TEXT)]))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,109 @@
+import os
+import tempfile
+import time
+import unittest
+
+from manifest import BuildManifest, GENERATOR_VERSION
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        self.source = self.write("index.md", "# Title\n\nBody")
+        self.template = self.write("template.html", "{{ Title }}{{ Content }}")
+        self.dest = self.write("index.html", "<p>Body</p>")
+        self.path = os.path.join(self.dir, "cache", "manifest.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.dir, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_fresh_after_record(self):
+        manifest = BuildManifest(self.path)
+        inputs = manifest.page_inputs(self.source, self.template, "/")
+        self.assertFalse(manifest.is_fresh(self.dest, inputs))
+        manifest.record(self.dest, inputs)
+        manifest.save()
+
+        reloaded = BuildManifest(self.path)
+        inputs = reloaded.page_inputs(self.source, self.template, "/")
+        self.assertTrue(reloaded.is_fresh(self.dest, inputs))
+
+    def test_stale_on_changed_inputs(self):
+        manifest = BuildManifest(self.path)
+        inputs = manifest.page_inputs(self.source, self.template, "/")
+        manifest.record(self.dest, inputs)
+        other_base = manifest.page_inputs(self.source, self.template, "/site")
+        self.assertFalse(manifest.is_fresh(self.dest, other_base))
+
+        time.sleep(0.01)
+        self.write("index.md", "# Title\n\nEdited body")
+        edited = manifest.page_inputs(self.source, self.template, "/")
+        self.assertFalse(manifest.is_fresh(self.dest, edited))
+
+    def test_front_matter_cached_by_stat(self):
+        manifest = BuildManifest(self.path)
+        self.write("draft.md", "---\ndraft: true\n---\n# Draft")
+        draft = os.path.join(self.dir, "draft.md")
+        self.assertEqual(manifest.front_matter(draft), {"draft": True})
+        manifest.save()
+
+        reloaded = BuildManifest(self.path)
+        reloaded.headers[draft]["front_matter"] = {"cached": True}
+        self.assertEqual(reloaded.front_matter(draft), {"cached": True})
+        self.write("draft.md", "---\ndraft: false\n---\n# Published")
+        self.assertEqual(reloaded.front_matter(draft), {"draft": False})
+
+    def test_stale_when_output_missing(self):
+        manifest = BuildManifest(self.path)
+        inputs = manifest.page_inputs(self.source, self.template, "/")
+        manifest.record(self.dest, inputs)
+        os.remove(self.dest)
+        self.assertFalse(manifest.is_fresh(self.dest, inputs))
+
+    def test_generator_version_mismatch(self):
+        manifest = BuildManifest(self.path)
+        manifest.record(self.dest, {"source": self.source})
+        manifest.save()
+        with open(self.path) as f:
+            data = f.read()
+        with open(self.path, "w") as f:
+            f.write(data.replace(f'"{GENERATOR_VERSION}"', '"old"'))
+        self.assertEqual(BuildManifest(self.path).pages, {})
+
+    def test_prune(self):
+        manifest = BuildManifest(self.path)
+        manifest.record(self.dest, {})
+        manifest.record(os.path.join(self.dir, "gone.html"), {})
+        removed = manifest.prune([self.dest])
+        self.assertEqual(list(manifest.pages), [self.dest])
+        self.assertEqual(removed, [os.path.join(self.dir, "gone.html")])
+
+    def test_stale_on_changed_dependency(self):
+        image = self.write("a.png", "png")
+        linked = os.path.join(self.dir, "other.md")
+        manifest = BuildManifest(self.path)
+        inputs = manifest.page_inputs(self.source, self.template, "/")
+        manifest.record(self.dest, inputs, {"files": [image], "pages": [linked]})
+        manifest.save()
+        manifest = BuildManifest(self.path)
+        self.assertTrue(manifest.is_fresh(self.dest, inputs))
+
+        time.sleep(0.01)
+        self.write("a.png", "new png")
+        self.assertFalse(manifest.is_fresh(self.dest, inputs))
+        manifest.record(self.dest, inputs, {"files": [image], "pages": [linked]})
+        self.assertTrue(manifest.is_fresh(self.dest, inputs))
+
+        self.write("other.md", "# Other")
+        self.assertFalse(manifest.is_fresh(self.dest, inputs))
+
+
+if __name__ == "__main__":
+    unittest.main()
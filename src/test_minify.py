@@ -0,0 +1,65 @@
+import unittest
+
+from block_markdown import markdown_to_html_node
+from minify import collapse_whitespace, minify_html
+from rendercontext import RenderContext
+from template import Template
+
+
+class TestMinify(unittest.TestCase):
+    def test_collapse_whitespace(self):
+        self.assertEqual(collapse_whitespace("a  b\n\tc"), "a b c")
+
+    def test_block_tags_lose_surrounding_whitespace(self):
+        source = """<!doctype html>
+<html>
+  <head>
+    <!-- a comment -->
+    <title>{{ Title }}</title>
+  </head>
+  <body>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+        self.assertEqual(
+            minify_html(source),
+            "<!doctype html><html><head><title>{{ Title }}</title></head>"
+            "<body><article>{{ Content }}</article></body></html>",
+        )
+
+    def test_inline_whitespace_kept_as_one_space(self):
+        self.assertEqual(
+            minify_html("<p>Hello   <b>big</b>\n  <i>world</i> </p>"),
+            "<p>Hello <b>big</b> <i>world</i></p>",
+        )
+
+    def test_preserved_elements(self):
+        source = (
+            "<div>\n  <pre>  keep\n   this </pre>\n"
+            " <script>if (a  <b) {}</script>\n</div>"
+        )
+        self.assertEqual(
+            minify_html(source),
+            "<div><pre>  keep\n   this </pre><script>if (a  <b) {}</script></div>",
+        )
+
+    def test_template_minified_once(self):
+        template = Template(
+            "<html>\n  <body>\n    {{ Content }}\n  </body>\n</html>",
+            context=RenderContext(minify=True),
+        )
+        self.assertEqual(template.chunks, ["<html><body>", "</body></html>"])
+
+    def test_text_collapsed_but_code_blocks_untouched(self):
+        md = "A  paragraph\nwith   spaces\n\n```\ncode   stays\n  indented\n```"
+        html = markdown_to_html_node(md, context=RenderContext(minify=True)).to_html()
+        self.assertEqual(
+            html,
+            "<div><p>A paragraph with spaces</p>"
+            "<pre><code>code   stays\n  indented\n</code></pre></div>",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
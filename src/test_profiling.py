@@ -0,0 +1,95 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+import profiling
+from dependencies import PageDependencies
+from profiling import Profiler
+from sitedata import PageMeta
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.profiler = Profiler(track_allocations=False)
+        self.profiler.start()
+
+    def tearDown(self):
+        self.profiler.stop()
+
+    def test_inactive_stage_is_noop(self):
+        self.profiler.stop()
+        with profiling.stage("render"):
+            pass
+        self.assertEqual(self.profiler.stages, {})
+
+    def test_nested_stage_records_self_time(self):
+        with profiling.stage("outer"):
+            with profiling.stage("inner"):
+                time.sleep(0.02)
+        outer = self.profiler.stages["outer"]["seconds"]
+        inner = self.profiler.stages["inner"]["seconds"]
+        self.assertGreaterEqual(inner, 0.02)
+        self.assertLess(outer, inner)
+
+    def test_stages_attributed_to_page(self):
+        with profiling.page("a.md"):
+            with profiling.stage("render"):
+                pass
+            with profiling.stage("render"):
+                pass
+        with profiling.stage("static copy"):
+            pass
+        self.assertEqual(self.profiler.stages["render"]["calls"], 2)
+        self.assertEqual(list(self.profiler.pages), ["a.md"])
+        self.assertIn("render", self.profiler.pages["a.md"]["stages"])
+        self.assertNotIn("static copy", self.profiler.pages["a.md"]["stages"])
+
+    def test_peak_counts_freed_allocations(self):
+        self.profiler.stop()
+        profiler = Profiler()
+        profiler.start()
+        try:
+            with profiling.stage("outer"):
+                with profiling.stage("inner"):
+                    data = bytearray(1 << 20)
+                    del data
+        finally:
+            profiler.stop()
+        # The megabyte was freed again, yet it still shows as inner's peak
+        # and not as outer's.
+        self.assertGreaterEqual(profiler.stages["inner"]["peak"], 1 << 20)
+        self.assertLess(profiler.stages["outer"]["peak"], 1 << 20)
+
+    def test_scans_have_their_own_stage(self):
+        deps = PageDependencies("a.md", ".")
+        meta = PageMeta("a.md")
+        blocks = ["# Title", "See [b](/b)"]
+        self.assertEqual(list(meta.track(deps.track(blocks))), blocks)
+        self.assertEqual(self.profiler.stages["index"]["calls"], 4)
+
+    def test_report(self):
+        with profiling.page("a.md"):
+            with profiling.stage("render"):
+                pass
+        report = self.profiler.report()
+        self.assertIn("render", report)
+        self.assertIn("a.md", report)
+
+    def test_save_trace(self):
+        with profiling.page("a.md"):
+            with profiling.stage("render"):
+                pass
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.json")
+            self.profiler.save_trace(path)
+            with open(path) as f:
+                events = json.load(f)["traceEvents"]
+        self.assertEqual([event["name"] for event in events], ["render", "page"])
+        self.assertEqual(events[0]["ph"], "X")
+        self.assertEqual(events[0]["args"], {"page": "a.md"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import os
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from unittest import mock
+
+import server
+from server import DevRequestHandler, DevServer, PageRenderer, safe_join
+
+
+class TestDevServer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        self.write(
+            os.path.join("content", "index.md"), "# Home\n\n[post](/blog/post)"
+        )
+        self.write(os.path.join("content", "blog", "post", "index.md"), "# Post")
+        self.write(os.path.join("static", "index.css"), "body {}")
+        renderer = PageRenderer(
+            os.path.join(self.root, "content"),
+            os.path.join(self.root, "template.html"),
+        )
+        self.server = DevServer(
+            ("localhost", 0), renderer, os.path.join(self.root, "static")
+        )
+        patcher = mock.patch.object(DevRequestHandler, "log_message")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.01}
+        )
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        exists = os.path.exists(path)
+        with open(path, "w") as f:
+            f.write(text)
+        if exists:
+            st = os.stat(path)
+            os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    def get(self, path, headers=None):
+        url = f"http://localhost:{self.server.server_port}{path}"
+        request = urllib.request.Request(url, headers=headers or {})
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.headers, response.read().decode()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, ""
+
+    def test_safe_join(self):
+        self.assertEqual(safe_join("root", "/../../etc/passwd"), "root/etc/passwd")
+
+    def test_renders_pages(self):
+        status, headers, body = self.get("/")
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            body,
+            "<title>Home</title>"
+            '<div><h1>Home</h1><p><a href="/blog/post">post</a></p></div>',
+        )
+        self.assertEqual(
+            self.get("/blog/post")[2], self.get("/blog/post/index.html")[2]
+        )
+        self.assertEqual(self.get("/missing")[0], 404)
+
+    def test_page_etag_and_invalidation(self):
+        _, headers, _ = self.get("/blog/post/")
+        etag = headers["ETag"]
+        self.assertEqual(self.get("/blog/post/", {"If-None-Match": etag})[0], 304)
+        self.write(os.path.join("content", "blog", "post", "index.md"), "# Edited")
+        status, headers, body = self.get("/blog/post/", {"If-None-Match": etag})
+        self.assertEqual(status, 200)
+        self.assertIn("<title>Edited</title>", body)
+
+    def test_pages_render_concurrently(self):
+        renderer = PageRenderer(
+            os.path.join(self.root, "content"),
+            os.path.join(self.root, "template.html"),
+        )
+        # Each render waits for the other one, so a render lock would
+        # make this time out.
+        barrier = threading.Barrier(2, timeout=5)
+        render_page = server.render_page
+
+        def render(*args):
+            barrier.wait()
+            return render_page(*args)
+
+        paths = [
+            os.path.join(self.root, "content", "index.md"),
+            os.path.join(self.root, "content", "blog", "post", "index.md"),
+        ]
+        results = {}
+        with mock.patch.object(server, "render_page", side_effect=render):
+            threads = [
+                threading.Thread(
+                    target=lambda path=path: results.update({path: renderer.get(path)})
+                )
+                for path in paths
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(set(results), set(paths))
+        self.assertIn(b"<title>Post</title>", results[paths[1]][0])
+
+    def test_static_conditional_requests(self):
+        status, headers, body = self.get("/index.css")
+        self.assertEqual((status, body), (200, "body {}"))
+        self.assertEqual(headers["Content-Type"], "text/css")
+        etag = {"If-None-Match": headers["ETag"]}
+        self.assertEqual(self.get("/index.css", etag)[0], 304)
+        since = {"If-Modified-Since": headers["Last-Modified"]}
+        self.assertEqual(self.get("/index.css", since)[0], 304)
+
+
+if __name__ == "__main__":
+    unittest.main()
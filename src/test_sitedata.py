@@ -0,0 +1,97 @@
+import json
+import os
+import unittest
+
+from rendercontext import RenderContext
+from sitedata import PageMeta, atom_feed, page_url, search_index, site_root, sitemap
+
+
+def meta(title, mtime, terms=(), description=""):
+    return {
+        "title": title,
+        "description": description,
+        "date": mtime,
+        "mtime": mtime,
+        "terms": sorted(terms),
+    }
+
+
+class TestSiteData(unittest.TestCase):
+    def test_page_url(self):
+        self.assertEqual(page_url(os.path.join("out", "index.html"), "out"), "/")
+        self.assertEqual(
+            page_url(os.path.join("out", "blog", "a", "index.html"), "out"),
+            "/blog/a/",
+        )
+        self.assertEqual(
+            page_url(os.path.join("out", "about.html"), "out"), "/about.html"
+        )
+
+    def test_terms_skip_code_urls_and_stop_words(self):
+        page = PageMeta("page.md")
+        blocks = [
+            "# The Title",
+            "Read [the docs](https://example.com/secret) and ![a](/img/hidden.png)",
+            "```\ncode_only\n```",
+        ]
+        self.assertEqual(list(page.track(blocks)), blocks)
+        self.assertEqual(sorted(page.terms - {"the", "and"}), ["docs", "read", "title"])
+
+    def test_search_index(self):
+        pages = {
+            "/b/": meta("B", 1, ["shared", "only"]),
+            "/a/": meta("A", 2, ["shared"]),
+        }
+        index = json.loads(search_index(pages))
+        self.assertEqual(index["pages"], [["/a/", "A"], ["/b/", "B"]])
+        self.assertEqual(index["terms"], {"only": [1], "shared": [0, 1]})
+
+    def test_site_root(self):
+        self.assertIsNone(site_root(RenderContext("/")))
+        self.assertEqual(
+            site_root(RenderContext("/"), "https://example.com/"), "https://example.com"
+        )
+        self.assertEqual(
+            site_root(RenderContext("https://example.com/site/")),
+            "https://example.com/site",
+        )
+
+    def test_sitemap_and_feed(self):
+        root = "https://example.com/site"
+        pages = {
+            "/": meta("Home & Away", 0),
+            "/blog/old/": meta("Old", 100, description="First <b>"),
+            "/blog/new/": meta("New", 200),
+        }
+        xml = sitemap(pages, root)
+        self.assertIn(
+            "<loc>https://example.com/site/blog/new/</loc>"
+            "<lastmod>1970-01-01T00:03:20Z</lastmod>",
+            xml,
+        )
+        feed = atom_feed(pages, ["/blog/old/", "/blog/new/"], root)
+        self.assertIn("<title>Home &amp; Away</title>", feed)
+        self.assertIn("<summary>First &lt;b&gt;</summary>", feed)
+        self.assertLess(
+            feed.index("<title>New</title>"), feed.index("<title>Old</title>")
+        )
+        self.assertIn(
+            "<updated>1970-01-01T00:03:20Z</updated>\n"
+            "<author><name>Home &amp; Away</name></author>\n<entry>",
+            feed,
+        )
+
+    def test_feed_author_and_empty_feed(self):
+        root = "https://example.com"
+        pages = {"/": {**meta("Home", 300), "author": "Ann"}, "/about/": meta("A", 0)}
+        feed = atom_feed(pages, [], root)
+        self.assertIn("<author><name>Ann</name></author>", feed)
+        # With no entries the feed dates from the latest page, not 1970.
+        self.assertIn("<updated>1970-01-01T00:05:00Z</updated>", feed)
+        self.assertNotIn("<entry>", feed)
+        feed = atom_feed(pages, [], root, author="Bo")
+        self.assertIn("<author><name>Bo</name></author>", feed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import io
+import unittest
+
+from rendercontext import RenderContext
+from template import Template
+
+
+class TestTemplate(unittest.TestCase):
+    def test_split_once(self):
+        template = Template("<title>{{ Title }}</title><main>{{Content}}</main>")
+        self.assertEqual(template.chunks, ["<title>", "</title><main>", "</main>"])
+        self.assertEqual(template.slots, ["Title", "Content"])
+        self.assertTrue(template.uses("Content"))
+        self.assertFalse(template.uses("Nav"))
+
+    def test_render(self):
+        template = Template("<h1>{{ Title }}</h1>{{ Content }}<p>{{ Date }}</p>")
+        html = template.render(
+            {"Title": "Hello", "Content": iter(["<p>a</p>", "<p>b</p>"])}
+        )
+        self.assertEqual(html, "<h1>Hello</h1><p>a</p><p>b</p><p></p>")
+
+    def test_repeated_streamed_slot(self):
+        template = Template("{{ Content }}|{{ Content }}")
+        html = template.render({"Content": (part for part in ["a", "b"])})
+        self.assertEqual(html, "ab|ab")
+
+    def test_write(self):
+        template = Template("<title>{{ Title }}</title>")
+        stream = io.StringIO()
+        template.write(stream, {"Title": "Hi"})
+        self.assertEqual(stream.getvalue(), "<title>Hi</title>")
+
+    def test_basepath_applied_at_compile_time(self):
+        template = Template(
+            '<link href="/index.css"><a href="//cdn.example.com/x">{{ Content }}',
+            context=RenderContext("/site"),
+        )
+        self.assertEqual(
+            template.chunks[0],
+            '<link href="/site/index.css"><a href="//cdn.example.com/x">',
+        )
+        self.assertEqual(template.render({"Content": 'href="/'}).count("/site"), 1)
+
+    def test_fingerprinted_assets(self):
+        context = RenderContext("/site", assets={"/index.css": "/index.abc123.css"})
+        template = Template(
+            '<link href="/index.css"><img src="/a.png">{{ Content }}', context=context
+        )
+        self.assertEqual(template.urls, ["/index.css", "/a.png"])
+        self.assertEqual(
+            template.chunks[0],
+            '<link href="/site/index.abc123.css"><img src="/site/a.png">',
+        )
+
+    def test_no_slots(self):
+        self.assertEqual(Template("<p>static</p>").render({}), "<p>static</p>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,12 @@
 import unittest
 
-from textnode import TextNode, TextType, text_node_to_html_node
+from rendercontext import RenderContext
+from textnode import (
+    TextNode,
+    TextType,
+    text_node_to_html_node,
+    write_text_nodes_html,
+)
 
 
 class TestTextNode(unittest.TestCase):
@@ -28,6 +34,10 @@ class TestTextNode(unittest.TestCase):
         node2 = TextNode("This is a text node", TextType.ITALIC, "https://www.boot.dev")
         self.assertEqual(node, node2)
 
+    def test_slots(self):
+        node = TextNode("This is a text node", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
+
     def test_repr(self):
         node = TextNode(
             "This is some anchor text", TextType.LINK, "https://www.boot.dev"
@@ -80,11 +90,69 @@ class TestTextNodeToHTMLNode(unittest.TestCase):
             {"src": "https://boot.dev/image.png", "alt": "This is an image node"},
         )
 
+    def test_basepath(self):
+        context = RenderContext("https://example.com/site/")
+        link = text_node_to_html_node(TextNode("home", TextType.LINK, "/"), context)
+        self.assertEqual(link.props, {"href": "https://example.com/site/"})
+        image = TextNode("pic", TextType.IMAGE, "/images/a.png")
+        self.assertEqual(
+            text_node_to_html_node(image, context).props["src"],
+            "https://example.com/site/images/a.png",
+        )
+        external = TextNode("out", TextType.LINK, "https://boot.dev")
+        self.assertEqual(
+            text_node_to_html_node(external, context).props["href"],
+            "https://boot.dev",
+        )
+        self.assertEqual(RenderContext("/").resolve_url("/blog"), "/blog")
+
     def test_unknown(self):
         node = TextNode("This is an unknown node", "unk")
         with self.assertRaises(ValueError):
             text_node_to_html_node(node)
 
 
+class TestWriteTextNodesHTML(unittest.TestCase):
+    def test_matches_leaf_nodes(self):
+        context = RenderContext("/site")
+        nodes = [
+            TextNode("plain ", TextType.TEXT),
+            TextNode("bold", TextType.BOLD),
+            TextNode("italic", TextType.ITALIC),
+            TextNode("code", TextType.CODE),
+            TextNode("link", TextType.LINK, "/blog"),
+            TextNode("alt", TextType.IMAGE, "/images/a.png"),
+        ]
+        out = []
+        write_text_nodes_html(nodes, out, context)
+        expected = [text_node_to_html_node(n, context).to_html() for n in nodes]
+        self.assertEqual(out, expected)
+
+    def test_image_attributes(self):
+        images = {
+            "/images/a.png": {
+                "width": 1000,
+                "height": 500,
+                "srcset": [["/images/a.480w.abcd1234.png", 480]],
+            }
+        }
+        context = RenderContext("/site", images=images)
+        node = TextNode("alt", TextType.IMAGE, "/images/a.png")
+        leaf = text_node_to_html_node(node, context)
+        self.assertEqual(leaf.props["width"], "1000")
+        self.assertEqual(leaf.props["height"], "500")
+        self.assertEqual(
+            leaf.props["srcset"],
+            "/site/images/a.480w.abcd1234.png 480w, /site/images/a.png 1000w",
+        )
+        out = []
+        write_text_nodes_html([node], out, context)
+        self.assertEqual(out, [leaf.to_html()])
+
+    def test_unknown(self):
+        with self.assertRaises(ValueError):
+            write_text_nodes_html([TextNode("x", "unk")], [])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,162 @@
+import os
+import tempfile
+import unittest
+
+from copystatic import fingerprint_assets
+from rendercontext import RenderContext
+from watch import SiteWatcher, diff_snapshots, scan_tree
+
+
+class TestSiteWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.static = os.path.join(self.root, "static")
+        self.dest = os.path.join(self.root, "public")
+        self.template = self.write(
+            "template.html", "<h1>{{ Title }}</h1>{{ Content }}"
+        )
+        self.write(os.path.join("content", "index.md"), "# Home\n\nHello")
+        self.write(os.path.join("content", "blog", "post.md"), "# Post\n\nBody")
+        self.write(os.path.join("static", "index.css"), "body {}")
+        self.watcher = SiteWatcher(
+            self.content, self.static, self.template, self.dest, "/"
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        exists = os.path.exists(path)
+        with open(path, "w") as f:
+            f.write(text)
+        if exists:
+            # Make sure the change is visible even on coarse mtime clocks.
+            st = os.stat(path)
+            os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        return path
+
+    def read(self, name):
+        with open(os.path.join(self.dest, name)) as f:
+            return f.read()
+
+    def test_scan_and_diff(self):
+        old = scan_tree(self.content)
+        self.assertEqual(len(old), 2)
+        self.write(os.path.join("content", "index.md"), "# Home\n\nEdited")
+        os.remove(os.path.join(self.content, "blog", "post.md"))
+        changed, removed = diff_snapshots(old, scan_tree(self.content))
+        self.assertEqual(changed, {os.path.join(self.content, "index.md")})
+        self.assertEqual(removed, {os.path.join(self.content, "blog", "post.md")})
+
+    def test_rerenders_only_changed_page(self):
+        self.assertEqual(self.watcher.poll(), 0)
+        self.write(os.path.join("content", "index.md"), "# Home\n\nEdited")
+        self.assertEqual(self.watcher.poll(), 1)
+        self.assertEqual(
+            self.read("index.html"),
+            "<h1>Home</h1><div><h1>Home</h1><p>Edited</p></div>",
+        )
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "blog", "post.html")))
+
+    def test_template_change_rerenders_everything(self):
+        self.write("template.html", "<title>{{ Title }}</title>")
+        self.assertEqual(self.watcher.poll(), 2)
+        self.assertEqual(
+            self.read(os.path.join("blog", "post.html")), "<title>Post</title>"
+        )
+
+    def test_static_and_removed_files(self):
+        self.write(os.path.join("content", "index.md"), "# Home\n\nEdited")
+        self.watcher.poll()
+        self.write(os.path.join("static", "images", "a.png"), "png")
+        os.remove(os.path.join(self.content, "index.md"))
+        self.watcher.poll()
+        self.assertEqual(self.read(os.path.join("images", "a.png")), "png")
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "index.html")))
+
+    def test_uses_build_context(self):
+        context = RenderContext(
+            "/", inline_nodes=False, assets={"/a.png": "/a.1234.png"}, minify=True
+        )
+        watcher = SiteWatcher(
+            self.content, self.static, self.template, self.dest, "/", context=context
+        )
+        self.write(os.path.join("content", "index.md"), "# Home\n\n![a](/a.png)  x")
+        watcher.poll()
+        self.assertEqual(
+            self.read("index.html"),
+            '<h1>Home</h1><div><h1>Home</h1><p><img src="/a.1234.png" alt="a"></img>'
+            " x</p></div>",
+        )
+
+    def test_fingerprinted_assets_follow_edits(self):
+        self.write("template.html", '<link href="/index.css">{{ Content }}')
+        state = os.path.join(self.root, "assets.json")
+        assets = fingerprint_assets(self.static, self.dest, state_path=state)
+        watcher = SiteWatcher(
+            self.content,
+            self.static,
+            self.template,
+            self.dest,
+            "/",
+            context=RenderContext("/", inline_nodes=False, assets=assets),
+            assets_state=state,
+        )
+        self.write(os.path.join("static", "index.css"), "body { color: red }")
+        self.assertEqual(watcher.poll(), 2)
+        new_name = watcher.context.assets["/index.css"]
+        self.assertNotEqual(new_name, assets["/index.css"])
+        self.assertTrue(os.path.exists(os.path.join(self.dest, new_name[1:])))
+        self.assertIn(f'href="{new_name}"', self.read("index.html"))
+
+    def test_drafts_are_taken_down(self):
+        self.write(os.path.join("content", "index.md"), "# Home\n\nEdited")
+        self.watcher.poll()
+        self.write(
+            os.path.join("content", "index.md"), "---\ndraft: true\n---\n# Home"
+        )
+        self.assertEqual(self.watcher.poll(), 0)
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "index.html")))
+
+    def test_dependency_changes_rerender_dependents(self):
+        self.write(os.path.join("static", "images", "a.png"), "png")
+        self.write(
+            os.path.join("content", "blog", "post.md"),
+            "# Post\n\n![a](/images/a.png) and [about](/about)",
+        )
+        self.assertEqual(self.watcher.poll(), 1)
+        self.write(os.path.join("static", "images", "a.png"), "new png")
+        self.assertEqual(self.watcher.poll(), 1)
+        self.assertEqual(self.read(os.path.join("images", "a.png")), "new png")
+        # Creating the linked page re-renders it and the page linking to it.
+        self.write(os.path.join("content", "about.md"), "# About")
+        self.assertEqual(self.watcher.poll(), 2)
+        self.write(os.path.join("static", "index.css"), "body { margin: 0 }")
+        self.assertEqual(self.watcher.poll(), 0)
+
+    def test_missing_template_is_retried(self):
+        self.write(os.path.join("content", "index.md"), "# Home\n\nEdited")
+        os.rename(self.template, self.template + ".tmp")
+        with self.assertRaises(FileNotFoundError):
+            self.watcher.poll()
+        os.rename(self.template + ".tmp", self.template)
+        # The edit seen by the failed poll is picked up by the next one.
+        self.assertEqual(self.watcher.poll(), 1)
+        self.assertIn("<p>Edited</p>", self.read("index.html"))
+
+    def test_failed_render_keeps_old_page(self):
+        self.write(os.path.join("content", "index.md"), "# Home\n\nEdited")
+        self.watcher.poll()
+        self.write(os.path.join("content", "index.md"), "no title")
+        with self.assertLogs("site", "ERROR"):
+            self.assertEqual(self.watcher.poll(), 0)
+        self.assertIn("<p>Edited</p>", self.read("index.html"))
+        self.assertEqual(os.listdir(self.dest), ["index.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+
+from writer import OutputWriter, replace_if_changed, write_if_changed
+
+
+class TestWriteIfChanged(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "page.html")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_writes_new_file(self):
+        self.assertTrue(write_if_changed(self.path, b"<p>hi</p>"))
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), b"<p>hi</p>")
+        self.assertEqual(os.listdir(self.tmp.name), ["page.html"])
+
+    def test_identical_content_keeps_mtime(self):
+        write_if_changed(self.path, b"<p>hi</p>")
+        os.utime(self.path, ns=(0, 10**9))
+        self.assertFalse(write_if_changed(self.path, b"<p>hi</p>"))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 10**9)
+
+    def test_same_size_different_content(self):
+        write_if_changed(self.path, b"<p>hi</p>")
+        self.assertTrue(write_if_changed(self.path, b"<p>yo</p>"))
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), b"<p>yo</p>")
+
+
+class TestReplaceIfChanged(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "page.html")
+        self.tmp_path = os.path.join(self.tmp.name, ".page.html.tmp")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def replace(self, data):
+        with open(self.tmp_path, "wb") as f:
+            f.write(data)
+        return replace_if_changed(self.tmp_path, self.path)
+
+    def test_replaces_only_changed_output(self):
+        # Larger than one compare chunk, differing only at the very end.
+        page = b"x" * (1 << 17)
+        self.assertTrue(self.replace(page + b"a"))
+        os.utime(self.path, ns=(0, 10**9))
+        self.assertFalse(self.replace(page + b"a"))
+        self.assertEqual(os.stat(self.path).st_mtime_ns, 10**9)
+        self.assertTrue(self.replace(page + b"b"))
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read()[-1:], b"b")
+        self.assertEqual(os.listdir(self.tmp.name), ["page.html"])
+
+
+class TestOutputWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_background_writes(self):
+        root = self.tmp.name
+        paths = [os.path.join(root, "a", str(i), "index.html") for i in range(20)]
+        with OutputWriter() as writer:
+            writer.make_dirs(paths)
+            futures = [
+                writer.submit(path, f"page {i}") for i, path in enumerate(paths)
+            ]
+        self.assertTrue(all(future.result() for future in futures))
+        for i, path in enumerate(paths):
+            with open(path) as f:
+                self.assertEqual(f.read(), f"page {i}")
+
+    def test_inline_writes(self):
+        path = os.path.join(self.tmp.name, "new", "index.html")
+        with OutputWriter(0) as writer:
+            first = writer.submit(path, "page")
+            self.assertTrue(first.done())
+            second = writer.submit(path, "page")
+        self.assertTrue(first.result())
+        self.assertFalse(second.result())
+
+    def test_streamed_writes(self):
+        path = os.path.join(self.tmp.name, "new", "index.html")
+        for workers in (0, 2):
+            with OutputWriter(workers) as writer:
+                with writer.create(path) as f:
+                    f.write("streamed")
+                future = writer.commit(f.name, path)
+            self.assertEqual(future.result(), workers == 0)
+        with open(path) as f:
+            self.assertEqual(f.read(), "streamed")
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["index.html"])
+
+    def test_write_error_surfaces_on_future(self):
+        path = os.path.join(self.tmp.name, "index.html")
+        os.mkdir(path)
+        with OutputWriter() as writer:
+            future = writer.submit(path, "page")
+        with self.assertRaises(OSError):
+            future.result()
+        self.assertEqual(os.listdir(self.tmp.name), ["index.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,6 +12,8 @@ class TextType(Enum):
 
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text: str, text_type: TextType, url: str | None = None):
         self.text = text
         self.text_type = text_type
@@ -28,7 +30,7 @@ class TextNode:
         return f"TextNode({self.text}, {self.text_type.value}, {self.url})"
 
 
-def text_node_to_html_node(text_node: TextNode) -> LeafNode:
+def text_node_to_html_node(text_node: TextNode, context=None) -> LeafNode:
     if text_node.text_type == TextType.TEXT:
         return LeafNode(None, text_node.text)
     elif text_node.text_type == TextType.BOLD:
@@ -38,7 +40,51 @@ def text_node_to_html_node(text_node: TextNode) -> LeafNode:
     elif text_node.text_type == TextType.CODE:
         return LeafNode("code", text_node.text)
     elif text_node.text_type == TextType.LINK:
-        return LeafNode("a", text_node.text, {"href": text_node.url})
+        url = context.resolve_url(text_node.url) if context else text_node.url
+        return LeafNode("a", text_node.text, {"href": url})
     elif text_node.text_type == TextType.IMAGE:
-        return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+        if context is None:
+            return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+        props = {"src": context.resolve_url(text_node.url), "alt": text_node.text}
+        attributes = context.image_attributes.get(text_node.url)
+        if attributes:
+            props.update(attributes)
+        return LeafNode("img", "", props)
     raise ValueError(f"Unsupported text type: {text_node.text_type}")
+
+
+def link_to_html(text_node: TextNode, context=None) -> str:
+    url = context.resolve_url(text_node.url) if context else text_node.url
+    return f'<a href="{url}">{text_node.text}</a>'
+
+
+def image_to_html(text_node: TextNode, context=None) -> str:
+    if context is None:
+        return f'<img src="{text_node.url}" alt="{text_node.text}"></img>'
+    url = context.resolve_url(text_node.url)
+    attributes = context.image_attributes.get(text_node.url)
+    extra = ""
+    if attributes:
+        extra = "".join(f' {key}="{value}"' for key, value in attributes.items())
+    return f'<img src="{url}" alt="{text_node.text}"{extra}></img>'
+
+
+# Emits the same markup as text_node_to_html_node(...).to_html() without
+# allocating the intermediate LeafNode.
+HTML_EMITTERS = {
+    TextType.TEXT: lambda text_node, context: text_node.text,
+    TextType.BOLD: lambda text_node, context: f"<b>{text_node.text}</b>",
+    TextType.ITALIC: lambda text_node, context: f"<i>{text_node.text}</i>",
+    TextType.CODE: lambda text_node, context: f"<code>{text_node.text}</code>",
+    TextType.LINK: link_to_html,
+    TextType.IMAGE: image_to_html,
+}
+
+
+def write_text_nodes_html(text_nodes: list[TextNode], out: list, context=None):
+    append = out.append
+    for text_node in text_nodes:
+        emit = HTML_EMITTERS.get(text_node.text_type)
+        if emit is None:
+            raise ValueError(f"Unsupported text type: {text_node.text_type}")
+        append(emit(text_node, context))
@@ -0,0 +1,256 @@
+import os
+import shutil
+import time
+
+from buildlog import log
+from copystatic import fingerprint_assets
+from dependencies import PageDependencies
+from fragmentcache import FragmentCache
+from frontmatter import is_draft, scan_front_matter
+from gencontent import find_pages, generate_page
+from rendercontext import RenderContext
+from template import Template
+from writer import OutputWriter
+
+
+def scan_tree(root: str) -> dict[str, tuple[int, int]]:
+    stats = {}
+    dirs = [root]
+    while dirs:
+        try:
+            entries = os.scandir(dirs.pop())
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(entry.path)
+                elif entry.is_file():
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        # Editors that save through a temp file and a rename
+                        # can remove it between the listing and the stat.
+                        continue
+                    stats[entry.path] = (st.st_mtime_ns, st.st_size)
+    return stats
+
+
+def diff_snapshots(old: dict, new: dict) -> tuple[set, set]:
+    changed = {path for path, stat in new.items() if old.get(path) != stat}
+    removed = old.keys() - new.keys()
+    return changed, removed
+
+
+class SiteWatcher:
+    def __init__(
+        self,
+        dir_path_content,
+        dir_path_static,
+        template_path,
+        dest_dir_path,
+        basepath,
+        cache=None,
+        manifest=None,
+        drafts=False,
+        context=None,
+        assets_state=None,
+        images=None,
+        images_state=None,
+    ):
+        self.dir_path_content = dir_path_content
+        self.dir_path_static = dir_path_static
+        self.template_path = template_path
+        self.dest_dir_path = dest_dir_path
+        self.drafts = drafts
+        self.manifest = manifest
+        # With --fingerprint and --images, static changes are re-run through
+        # the same steps as in the build.
+        self.assets_state = assets_state
+        self.images = images
+        self.images_state = images_state
+        if context is None:
+            context = RenderContext(basepath, inline_nodes=False)
+        self.context = context
+        # Unchanged blocks of an edited page come straight from memory.
+        self.cache = cache if cache is not None else FragmentCache()
+        self.template = Template.load(template_path, self.context)
+        self.pages = dict(find_pages(dir_path_content, dest_dir_path))
+        # Dependency edges per source page, seeded from the last build.
+        self.deps = {}
+        if manifest is not None:
+            for from_path, dest_path in self.pages.items():
+                entry = manifest.pages.get(dest_path, {})
+                self.deps[from_path] = {
+                    "files": list(entry.get("files", ())),
+                    "pages": list(entry.get("pages", ())),
+                }
+        self.content = scan_tree(dir_path_content)
+        self.static = scan_tree(dir_path_static)
+        self.template_stat = self.stat_template()
+
+    def stat_template(self):
+        st = os.stat(self.template_path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def dest_path(self, root: str, path: str) -> str:
+        return os.path.join(self.dest_dir_path, os.path.relpath(path, root))
+
+    def dependents(self, paths) -> set:
+        paths = set(paths)
+        return {
+            from_path
+            for from_path, deps in self.deps.items()
+            if not paths.isdisjoint(deps["files"])
+            or not paths.isdisjoint(deps["pages"])
+        }
+
+    def refresh_static(self) -> bool:
+        # Returns whether pages now render differently.
+        assets = self.context.assets
+        if self.assets_state is not None:
+            assets = fingerprint_assets(
+                self.dir_path_static,
+                self.dest_dir_path,
+                self.manifest,
+                self.assets_state,
+            )
+        images = self.context.images
+        if self.images is not None:
+            images = self.images.process(
+                self.dir_path_static, self.dest_dir_path, self.images_state
+            )
+        context = RenderContext(
+            self.context.basepath,
+            self.context.inline_nodes,
+            assets=assets,
+            images=images,
+            minify=self.context.minify,
+        )
+        if context.fingerprint == self.context.fingerprint:
+            return False
+        self.context = context
+        return True
+
+    def template_links_changed(self, old_context) -> bool:
+        return any(
+            old_context.resolve_url(url) != self.context.resolve_url(url)
+            for url in self.template.urls
+        )
+
+    def is_draft(self, path: str) -> bool:
+        try:
+            return is_draft(scan_front_matter(path))
+        except ValueError:
+            return False
+
+    def poll(self) -> int:
+        # One batch: every change seen in this scan is handled together.
+        rendered = 0
+        content = scan_tree(self.dir_path_content)
+        changed, removed = diff_snapshots(self.content, content)
+        static = scan_tree(self.dir_path_static)
+        static_changed, static_removed = diff_snapshots(self.static, static)
+
+        # Static files go first so pages re-rendered below see the new ones.
+        for path in sorted(static_changed):
+            dest_path = self.dest_path(self.dir_path_static, path)
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            shutil.copy2(path, dest_path)
+            log.info("Copied %s to %s", path, dest_path)
+        for path in sorted(static_removed):
+            dest_path = self.dest_path(self.dir_path_static, path)
+            if os.path.exists(dest_path):
+                os.remove(dest_path)
+                log.info("Removed %s", dest_path)
+
+        for path in sorted(removed):
+            self.deps.pop(path, None)
+            dest_path = self.pages.pop(path, None)
+            if dest_path is not None and os.path.exists(dest_path):
+                os.remove(dest_path)
+                log.info("Removed %s", dest_path)
+
+        old_context = self.context
+        context_changed = bool(static_changed or static_removed) and (
+            self.refresh_static()
+        )
+        template_stat = self.stat_template()
+        if template_stat != self.template_stat or (
+            context_changed and self.template_links_changed(old_context)
+        ):
+            self.template = Template.load(self.template_path, self.context)
+            self.template_stat = template_stat
+            stale = set(content)
+        else:
+            # Edited pages, plus pages whose images changed or whose links
+            # or breadcrumbs point at a page that appeared or disappeared.
+            created = {path for path in changed if path not in self.pages}
+            stale = (
+                changed
+                | self.dependents(static_changed | static_removed)
+                | self.dependents(created | removed)
+            )
+
+        with OutputWriter(0) as writer:
+            for path in sorted(stale):
+                if not path.endswith(".md") or path not in content:
+                    continue
+                dest_path = self.dest_path(self.dir_path_content, path)[:-3] + ".html"
+                if not self.drafts and self.is_draft(path):
+                    # A page turned into a draft is taken down like a removed one.
+                    self.pages.pop(path, None)
+                    if os.path.exists(dest_path):
+                        os.remove(dest_path)
+                        log.info("Removed draft %s", dest_path)
+                    continue
+                self.pages[path] = dest_path
+                deps = PageDependencies(
+                    path, self.dir_path_content, self.dir_path_static
+                )
+                try:
+                    # As in the build, a failed render keeps the old page.
+                    generate_page(
+                        path,
+                        self.template,
+                        dest_path,
+                        self.context,
+                        self.cache,
+                        self.dir_path_content,
+                        writer,
+                        deps,
+                    ).result()
+                    rendered += 1
+                except Exception as e:
+                    log.error("Error rendering %s: %s: %s", path, type(e).__name__, e)
+                self.deps[path] = deps.to_dict()
+        # Only now is the scan taken as seen: if anything above failed, the
+        # next poll finds the same changes and tries them again.
+        self.content = content
+        self.static = static
+        return rendered
+
+    def run(self, interval: float = 0.1):
+        log.info(
+            "Watching %s, %s and %s for changes...",
+            self.dir_path_content,
+            self.dir_path_static,
+            self.template_path,
+        )
+        error = None
+        while True:
+            time.sleep(interval)
+            start = time.perf_counter()
+            try:
+                rendered = self.poll()
+            except OSError as e:
+                # Usually a file caught mid-save; retry on the next tick,
+                # saying so once rather than every tick.
+                if str(e) != error:
+                    log.warning("Watch error, retrying: %s", e)
+                error = str(e)
+                continue
+            error = None
+            if rendered:
+                elapsed = (time.perf_counter() - start) * 1000
+                log.info("Rebuilt %d page(s) in %.0fms", rendered, elapsed)
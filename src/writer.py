@@ -0,0 +1,131 @@
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+def load_json_state(state_path: str | None, default):
+    # Build state is only a cache: anything missing or unreadable starts over.
+    if state_path is None or not os.path.exists(state_path):
+        return default
+    try:
+        with open(state_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def save_json_state(state_path: str, state):
+    dir = os.path.dirname(state_path)
+    if dir:
+        os.makedirs(dir, exist_ok=True)
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, state_path)
+
+
+def temp_path(path: str) -> str:
+    dir, name = os.path.split(path)
+    return os.path.join(dir, f".{name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def write_if_changed(path: str, data: bytes) -> bool:
+    # Leaving identical files alone keeps their mtimes stable, so deploys
+    # only upload what actually changed.
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, "rb") as f:
+                if f.read() == data:
+                    return False
+    except FileNotFoundError:
+        pass
+    tmp_path = temp_path(path)
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True
+
+
+def same_contents(a: str, b: str, chunk_size: int = 1 << 16) -> bool:
+    with open(a, "rb") as fa, open(b, "rb") as fb:
+        while True:
+            chunk = fa.read(chunk_size)
+            if chunk != fb.read(chunk_size):
+                return False
+            if not chunk:
+                return True
+
+
+def replace_if_changed(tmp_path: str, path: str) -> bool:
+    # write_if_changed() for output that was streamed to tmp_path; both
+    # files are compared a chunk at a time.
+    try:
+        try:
+            same_size = os.path.getsize(path) == os.path.getsize(tmp_path)
+        except FileNotFoundError:
+            same_size = False
+        if same_size and same_contents(tmp_path, path):
+            os.remove(tmp_path)
+            return False
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return True
+
+
+class OutputWriter:
+    def __init__(self, workers: int = 4):
+        # With no workers every write happens inline in submit().
+        self.executor = None
+        if workers > 0:
+            self.executor = ThreadPoolExecutor(workers, thread_name_prefix="writer")
+        self.dirs = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def make_dirs(self, paths):
+        for dir in {os.path.dirname(path) for path in paths} - self.dirs:
+            os.makedirs(dir, exist_ok=True)
+            self.dirs.add(dir)
+
+    def write(self, path: str, text: str) -> bool:
+        self.make_dirs([path])
+        return write_if_changed(path, text.encode())
+
+    def submit(self, path: str, text: str) -> Future:
+        return self.run(self.write, path, text)
+
+    def create(self, path: str):
+        # Opens a temp file next to path to stream output into, so nothing
+        # holds a whole page in memory; pass it to commit() once written.
+        self.make_dirs([path])
+        return open(temp_path(path), "w")
+
+    def commit(self, tmp_path: str, path: str) -> Future:
+        return self.run(replace_if_changed, tmp_path, path)
+
+    def run(self, fn, *args) -> Future:
+        if self.executor is not None:
+            return self.executor.submit(fn, *args)
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)